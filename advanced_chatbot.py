@@ -1,211 +1,318 @@
 """
 Neralu Farms AI Chatbot - Advanced Version with OpenAI Integration
-This version uses OpenAI's GPT for more natural and contextual conversations
+This version uses OpenAI's GPT for more natural and contextual conversations.
+Messages with a clear intent are answered instantly by the rule engine from
+app.py; only general or ambiguous ones go to the LLM (HYBRID_ROUTING=0
+sends everything to the LLM).
 
 To use this version:
-1. Install openai: pip install openai
+1. Install dependencies: pip install -r requirements.txt
 2. Set your OPENAI_API_KEY environment variable
+   (or LLM_BASE_URL for any other OpenAI-compatible server)
 3. Run: python advanced_chatbot.py
 """
 
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
+import atexit
 import os
-from datetime import datetime
 import json
 
-# Uncomment when ready to use OpenAI
-# import openai
-# openai.api_key = os.getenv('OPENAI_API_KEY')
+from knowledge import KNOWLEDGE
+from lead_capture import LeadExtractor
+from leads_api import create_leads_blueprint
+from llm_backend import AsyncLLMBackend, LLMError
+from metrics import Metrics, SlowRequestProfiler, create_metrics_blueprint, request_timer
+from prompt_builder import PromptBuilder
+from response_cache import ResponseCache
+from router import ROUTE_CACHE, ROUTE_LLM, ROUTE_RULES, HybridRouter, RouteDecision
+from shared_state import open_state
+from streaming import split_for_streaming, streaming_response
+
 
 app = Flask(__name__)
 CORS(app)
 
-# Store conversation history
-conversations = {}
-leads = []
-
-# Neralu Farms System Prompt for AI
-SYSTEM_PROMPT = """You are an AI assistant for Neralu Farms (also called Neralu Managed Farms), a premium managed farmland company.
-
-BRAND IDENTITY:
-- Neralu offers fully managed farmland with clear ownership
-- Focus on nature-based luxury, sustainability, and long-term value
-- Projects: Korlaparti Project and Sandal Valley Project
-- Plantations: Mango, Coconut, Timber, and Sandalwood
-
-YOUR RESPONSIBILITIES:
-1. Provide accurate information about Neralu Farms only
-2. Help users understand managed farmland concept
-3. Guide prospects through site visit booking process
-4. Capture leads (name and phone number) naturally in conversation
-5. Be warm, professional, and helpful
-6. Use emojis sparingly to add warmth (🌿 🌱 🌳 🏞️ 💼)
-
-COMMUNICATION STYLE:
-- Friendly but professional tone
-- Short, clear responses (3-5 sentences preferred)
-- Avoid jargon and overly technical language
-- Focus on benefits and lifestyle, not just features
-- Ask clarifying questions when needed
-
-BRAND RULES:
-- ONLY discuss Neralu Farms and its offerings
-- If asked about competitors, politely redirect to Neralu
-- Never fabricate information
-- For pricing, encourage site visit or team contact
-- For detailed technical questions, offer to connect with team
-
-KEY INFORMATION:
-
-Managed Farmland Concept:
-- You own the land with clear legal title
-- Neralu manages plantation, maintenance, and harvesting
-- Passive income from yields + land appreciation
-- Weekend getaway and lifestyle benefits
-- Tax advantages on agricultural land
-
-Projects:
-1. Korlaparti Project: Well-planned layouts, excellent connectivity
-2. Sandal Valley Project: Premium sandalwood focus, luxury amenities
-
-Plantations:
-- Mango: Premium varieties, excellent yields
-- Coconut: High-yielding, consistent returns
-- Timber: Long-term value with teak and hardwoods
-- Sandalwood: Premium long-term investment
-
-Benefits:
-- Passive income from plantation
-- Land appreciation (5-15 years)
-- Tax benefits
-- Weekend farmhouse retreat
-- Professional management included
-- Sustainable investment
-
-Amenities:
-- Paved roads, drip irrigation, electricity
-- Bore wells, security, fencing
-- Clubhouse, play areas, walking trails
-- Organic farming zones
-
-Legal:
-- Clear titles, RERA compliant
-- Transparent documentation
-- Legal due diligence support
-
-Site Visit Process:
-1. Collect: Name, phone, preferred project, date
-2. Confirm visit details
-3. User visits property
-4. Team explains options, pricing, documentation
-
-LEAD CAPTURE:
-- Naturally ask for name and phone during conversation
-- Good moment: When user shows interest in site visit or booking
-- Example: "I'd love to arrange that for you! May I have your name and phone number?"
-
-RESTRICTIONS:
-- Don't discuss competitors or compare with other brands
-- Don't provide specific pricing (varies by project/size/time)
-- Don't guarantee specific returns or appreciation rates
-- Don't make investment advice (encourage consultation)
-
-If unsure about any information, offer to connect the user with the Neralu team for accurate details.
-"""
+# LLM backend; only used once an API key or a custom endpoint is configured
+llm = AsyncLLMBackend.from_env()
+LLM_ENABLED = bool(os.getenv('OPENAI_API_KEY') or os.getenv('LLM_BASE_URL'))
+atexit.register(llm.close)
+
+# Sessions and leads, in this process or shared by every worker (SHARED_STATE_PATH)
+conversations, leads, persistence = open_state()
+app.register_blueprint(create_leads_blueprint(leads, conversations, persistence))
+
+# Rule engine first, LLM only when the intent is unclear
+HYBRID_ROUTING = os.getenv('HYBRID_ROUTING', '1') != '0'
+router = HybridRouter(KNOWLEDGE.current.matcher, min_confidence=float(os.getenv('ROUTER_MIN_CONFIDENCE', '0.5')))
+
+# Prompt token budget; older turns beyond it are folded into a per-session summary
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '1600'))
+PROMPT_SUMMARY_TOKENS = int(os.getenv('PROMPT_SUMMARY_TOKENS', '250'))
+
+# A slim persona prompt plus the knowledge passages relevant to each question,
+# instead of the full fact sheet (PROMPT_RETRIEVAL=0 sends the fact sheet)
+PROMPT_RETRIEVAL = os.getenv('PROMPT_RETRIEVAL', '1') != '0'
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '4'))
+RETRIEVAL_CONTEXT_TOKENS = int(os.getenv('RETRIEVAL_CONTEXT_TOKENS', '350'))
+
+def create_prompt_builder(compiled):
+    if PROMPT_RETRIEVAL:
+        return PromptBuilder(compiled.persona_prompt, PROMPT_TOKEN_BUDGET, PROMPT_SUMMARY_TOKENS,
+                             RETRIEVAL_CONTEXT_TOKENS)
+    return PromptBuilder(compiled.system_prompt, PROMPT_TOKEN_BUDGET, PROMPT_SUMMARY_TOKENS)
+
+prompt_builder = create_prompt_builder(KNOWLEDGE.current)
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+# Common questions; with the knowledge base they set the cache's word weights
+FAQ_QUESTIONS = [
+    "What is managed farmland?",
+    "How does managed farmland work?",
+    "What is the price of a plot?",
+    "How much does it cost?",
+    "Can I book a site visit?",
+    "How do I schedule a site visit?",
+    "Which plantations do you offer?",
+    "Tell me about the Korlaparti project",
+    "Tell me about the Sandal Valley project",
+    "What are the benefits of investing?",
+    "Is the land title clear and RERA approved?",
+    "What amenities are available?",
+]
+
+def cache_corpus(compiled):
+    """Documents the response cache weighs question words by: the system
+    prompt, every fact and brochure passage, and common questions"""
+    passages = [f"{passage.title} {passage.text}" for passage in compiled.retriever.passages]
+    return compiled.system_prompt.splitlines() + passages + FAQ_QUESTIONS
+
+# Answers to repeated questions, reused instead of calling the LLM again
+response_cache = ResponseCache(
+    cache_corpus(KNOWLEDGE.current),
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600')),
+    similarity_threshold=float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0.85'))
+)
+
+def use_knowledge(compiled):
+    """After a knowledge reload, build prompts from the new prompts, weigh
+    cached questions by the new facts' vocabulary and stop reusing answers
+    given from the old facts"""
+    global prompt_builder
+    prompt_builder = create_prompt_builder(compiled)
+    response_cache.reseed(cache_corpus(compiled))
+
+KNOWLEDGE.on_swap(use_knowledge)
+
+# Latency per request and per /chat stage, served at /metrics
+RESPONSE_STAGES = {
+    ROUTE_RULES: "generate_response",
+    ROUTE_CACHE: "cached_response",
+    ROUTE_LLM: "generate_ai_response",
+}
+metrics = Metrics()
+metrics.gauge("sessions", "Conversations held in memory by this process", lambda: len(conversations))
+metrics.gauge("leads", "Captured leads", lambda: len(leads))
+metrics.gauge("knowledge_version", "Version of the knowledge file in use, counting from 1 at startup",
+              lambda: KNOWLEDGE.current.version)
+metrics.gauge("knowledge_compile_seconds", "Time to compile the latest knowledge version",
+              lambda: KNOWLEDGE.last_compile_seconds)
+metrics.counter("knowledge_reload_errors", "Knowledge file edits that failed to load",
+                lambda: KNOWLEDGE.reload_errors)
+metrics.gauge("response_cache_hit_rate", "Share of cache lookups answered from the cache",
+              response_cache.hit_rate)
+metrics.gauge("response_cache_entries", "Answers held in the response cache", lambda: len(response_cache))
+metrics.counter("llm_tokens", "LLM tokens used, by kind",
+                lambda: {("kind", key.replace("_tokens", "")): value for key, value in llm.usage.items()})
+metrics.counter("llm_events", "LLM calls, retries and errors",
+                lambda: {("event", key): value for key, value in llm.stats.items()})
+metrics.counter("routed_requests", "Chat requests by route",
+                lambda: {("route", key): value for key, value in router.counts.items()})
+app.register_blueprint(create_metrics_blueprint(metrics, SlowRequestProfiler.from_env()))
+
+def is_cacheable(user_message):
+    """Messages carrying a name or phone number get a personal answer"""
+    extractor = LeadExtractor()
+    extractor.feed(user_message)
+    return not (extractor.name or extractor.phone)
+
 @app.route('/chat', methods=['POST'])
 def chat():
-    """Handle chat messages with OpenAI integration"""
+    """Handle chat messages with the rule engine or OpenAI integration"""
+    timer = request_timer()
     data = request.json
     user_message = data.get('message', '')
     session_id = data.get('session_id', 'default')
+    # One knowledge version for the whole request, even if a reload lands
+    knowledge = KNOWLEDGE.current
+    timer.lap("parse")
     
-    # Initialize conversation history
-    if session_id not in conversations:
-        conversations[session_id] = []
+    # Get or start the conversation history
+    session = conversations.get_or_create(session_id)
     
     # Add user message
-    conversations[session_id].append({
-        "role": "user",
-        "content": user_message,
-        "timestamp": datetime.now().isoformat()
-    })
+    persistence.record_message(session_id, session.append("user", user_message))
+    earlier = list(session.messages)[:-1]
+    timer.lap("session")
     
-    # For now, return a placeholder response
-    # In production, replace this with OpenAI API call
-    response = generate_ai_response(user_message, conversations[session_id])
+    # Capture leads whichever engine answers; only the new message is scanned
+    session.lead.feed(user_message)
+    lead_info = session.lead.as_dict()
+    timer.lap("extract_lead_info")
+    if lead_info["phone"]:
+        lead, changed = leads.upsert(session_id, lead_info["name"], lead_info["phone"], lead_info["project"])
+        if changed:
+            persistence.record_lead(lead)
+        timer.lap("lead_store")
     
-    # Add assistant response
-    conversations[session_id].append({
-        "role": "assistant",
-        "content": response,
-        "timestamp": datetime.now().isoformat()
-    })
+    if HYBRID_ROUTING:
+        decision = router.route(user_message, knowledge.matcher)
+    else:
+        decision = RouteDecision(ROUTE_LLM, "general", 0.0)
+    route = decision.route
+    timer.lap("route")
+    
+    # Check the cache before calling the LLM unless the client opted out
+    cached = None
+    use_cache = (
+        route == ROUTE_LLM
+        and data.get('cache', True) is not False
+        and request.headers.get('Cache-Control') != 'no-cache'
+        and is_cacheable(user_message)
+    )
+    if use_cache:
+        cached = response_cache.get(user_message, earlier)
+        if cached is not None:
+            route = ROUTE_CACHE
+    elif route == ROUTE_LLM:
+        response_cache.record_bypass()
+    if route != ROUTE_RULES:
+        timer.lap("cache_lookup")
     
+    def finish(response):
+        # When streaming, this runs once the last chunk has been sent
+        timer.lap(RESPONSE_STAGES[route])
+        persistence.record_message(session_id, session.append("assistant", response, decision.intent))
+        if use_cache and cached is None and is_cacheable_reply(response):
+            response_cache.put(user_message, earlier, response)
+        router.record(session_id, route, decision.intent, decision.confidence, timer.elapsed())
+        timer.lap("record_reply")
+        return {
+            "session_id": session_id,
+            "intent": decision.intent,
+            "route": route,
+            "cached": cached is not None,
+            "lead_captured": bool(lead_info["phone"])
+        }
+    
+    if data.get('stream'):
+        if route == ROUTE_RULES:
+            chunks = knowledge.responses.get(decision.intent).chunks
+        elif cached is not None:
+            chunks = split_for_streaming(cached)
+        else:
+            chunks = stream_ai_response(user_message, session, knowledge)
+        return streaming_response(chunks, finish)
+    
+    # Ask the LLM (returns a placeholder until one is configured)
+    if route == ROUTE_RULES:
+        response = knowledge.responses.text(decision.intent)
+    elif cached is not None:
+        response = cached
+    else:
+        response = generate_ai_response(user_message, session, knowledge)
+    
+    reply = jsonify({"response": response, **finish(response)})
+    timer.lap("serialize")
+    return reply
+
+@app.route('/routing', methods=['GET'])
+def routing_stats():
+    """Routing decisions and latency per route (admin endpoint)"""
+    return jsonify({**router.summary(), "recent": router.recent()})
+
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    """Response cache counters (admin endpoint)"""
     return jsonify({
-        "response": response,
-        "session_id": session_id
+        **response_cache.stats,
+        "entries": len(response_cache),
+        "hit_rate": round(response_cache.hit_rate(), 4)
     })
 
-def generate_ai_response(user_message, conversation_history):
+PLACEHOLDER_RESPONSE = (
+    "Thank you for your interest in Neralu Farms! 🌿\n\n"
+    "This is the advanced version of the chatbot. To enable full AI capabilities:\n"
+    "1. Install dependencies: pip install -r requirements.txt\n"
+    "2. Set your OPENAI_API_KEY environment variable\n"
+    "3. Restart advanced_chatbot.py\n\n"
+    "For now, please use the standard chatbot (app.py) which has full rule-based responses.\n\n"
+    "How can I assist you with information about our managed farmland?"
+)
+
+ERROR_RESPONSE = "I apologize, but I'm having trouble processing your request. Please try again or contact our team directly."
+
+def is_cacheable_reply(response):
+    """Only real LLM answers are cached, never the placeholder or an error"""
+    return bool(response.strip()) and response != PLACEHOLDER_RESPONSE and not response.endswith(ERROR_RESPONSE)
+
+def build_prompt(session, knowledge):
+    """Messages for the LLM: with retrieval, the facts relevant to the latest
+    question and the one before it, so follow-ups keep their topic"""
+    if not PROMPT_RETRIEVAL:
+        return prompt_builder.build(session)
+    asked = [msg.content for msg in session.messages if msg.role == "user"][-2:]
+    context = (knowledge or KNOWLEDGE.current).retriever.context(
+        " ".join(asked), RETRIEVAL_TOP_K, RETRIEVAL_CONTEXT_TOKENS
+    )
+    return prompt_builder.build(session, context)
+
+def generate_ai_response(user_message, session, knowledge=None):
     """
-    Generate AI response using OpenAI
+    Generate AI response using the configured LLM backend
     
-    To implement:
-    1. Uncomment OpenAI import at top
-    2. Set OPENAI_API_KEY environment variable
-    3. Uncomment the code below
+    To enable:
+    1. Set OPENAI_API_KEY (and optionally LLM_MODEL) in the environment
+    2. Or point LLM_BASE_URL at any OpenAI-compatible server
     """
+    if not LLM_ENABLED:
+        # Basic response until an LLM is configured
+        return PLACEHOLDER_RESPONSE
     
-    # UNCOMMENT THIS BLOCK WHEN READY TO USE OPENAI:
-    """
     try:
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        
-        # Add conversation history
-        for msg in conversation_history[-10:]:  # Last 10 messages for context
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # or "gpt-3.5-turbo" for faster/cheaper
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        return response.choices[0].message.content
-        
-    except Exception as e:
-        print(f"OpenAI Error: {e}")
-        return "I apologize, but I'm having trouble processing your request. Please try again or contact our team directly."
-    """
-    
-    # TEMPORARY: Basic response (remove when implementing OpenAI)
-    return (
-        "Thank you for your interest in Neralu Farms! 🌿\n\n"
-        "This is the advanced version of the chatbot. To enable full AI capabilities:\n"
-        "1. Install OpenAI: pip install openai\n"
-        "2. Set your OPENAI_API_KEY environment variable\n"
-        "3. Uncomment the OpenAI code in advanced_chatbot.py\n\n"
-        "For now, please use the standard chatbot (app.py) which has full rule-based responses.\n\n"
-        "How can I assist you with information about our managed farmland?"
-    )
+        return llm.complete_sync(build_prompt(session, knowledge))
+    except LLMError as e:
+        print(f"LLM Error: {e}")
+        return ERROR_RESPONSE
 
-@app.route('/leads', methods=['GET'])
-def get_leads():
-    return jsonify({"leads": leads, "total": len(leads)})
+def stream_ai_response(user_message, session, knowledge=None):
+    """Like generate_ai_response, but yields the reply as the LLM produces it"""
+    if not LLM_ENABLED:
+        yield from split_for_streaming(PLACEHOLDER_RESPONSE)
+        return
+    
+    sent_any = False
+    try:
+        for text in llm.stream_sync(build_prompt(session, knowledge)):
+            sent_any = True
+            yield text
+    except LLMError as e:
+        print(f"LLM Error: {e}")
+        yield ("\n\n" if sent_any else "") + ERROR_RESPONSE
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "healthy", "service": "Neralu Farms Advanced Chatbot"})
+    return jsonify({
+        "status": "healthy",
+        "service": "Neralu Farms Advanced Chatbot",
+        **conversations.stats(),
+        **KNOWLEDGE.stats()
+    })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; use wsgi.py with gunicorn in production
+    app.run(debug=os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true'), host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
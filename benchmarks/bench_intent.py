@@ -0,0 +1,163 @@
+"""
+Benchmark: precompiled intent matcher vs the original substring loops
+
+Checks the matcher against a golden set of labelled messages, then measures
+throughput of both implementations over synthetic messages. The two take
+turns over the same messages and each keeps its best of ``--repeat`` runs,
+so a noisy neighbour slowing down one run does not decide the comparison.
+
+Run from the repository root:
+    python benchmarks/bench_intent.py [--messages 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import detect_intent  # noqa: E402
+from knowledge import KNOWLEDGE  # noqa: E402
+
+INTENT_PATTERNS = KNOWLEDGE.current.intent_patterns
+
+
+def legacy_detect_intent(user_message):
+    """The original detect_intent: first dict-order substring hit wins"""
+    message_lower = user_message.lower()
+
+    for intent, patterns in INTENT_PATTERNS.items():
+        for pattern in patterns:
+            if pattern in message_lower:
+                return intent
+
+    return "general"
+
+
+# (message, expected intent, legacy result differs on purpose)
+GOLDEN_SET = [
+    ("Hello", "greeting", False),
+    ("hi there", "greeting", False),
+    ("Good morning!", "greeting", False),
+    ("Namaste", "greeting", False),
+    ("Who are you?", "about_neralu", False),
+    ("Tell me about Neralu Farms", "about_neralu", False),
+    ("What is managed farmland?", "managed_farmland", False),
+    ("How does it work?", "managed_farmland", False),
+    ("Explain the ownership model", "managed_farmland", True),
+    ("What plantations do you offer?", "plantations", False),
+    ("I like mango trees", "plantations", False),
+    ("Is sandalwood profitable?", "plantations", False),
+    ("What can I grow on the land?", "plantations", False),
+    ("Show me your projects", "projects", False),
+    ("Tell me about Korlaparti", "about_neralu", False),
+    ("Details of sandal valley please", "projects", False),
+    ("What are the benefits?", "benefits", False),
+    ("Why invest in farmland", "benefits", False),
+    ("What amenities are there?", "amenities", False),
+    ("Is there a clubhouse?", "amenities", False),
+    ("What is the price?", "pricing", False),
+    ("How much does it cost", "pricing", False),
+    ("Can I visit the farm?", "site_visit", False),
+    ("I want to book a site visit", "site_visit", False),
+    ("I want to buy a plot", "booking", False),
+    ("I am interested", "booking", False),
+    ("Are the documents legal?", "legal", False),
+    ("Is it RERA registered", "legal", False),
+    ("How can I contact you?", "contact", False),
+    ("Can I talk to someone", "contact", False),
+    ("What's the weather like", "general", False),
+    ("Thanks", "general", False),
+    # Intentional changes: word boundaries and the explicit scoring rule
+    ("Where can I book a visit?", "site_visit", True),
+    ("This is great", "general", True),
+    ("Which one should I choose?", "general", True),
+    ("Whereabouts is the township", "general", True),
+    ("Hi, I want to invest", "booking", True),
+    ("I'd like to schedule a tour this weekend", "site_visit", True),
+    ("I am booking a site visit", "site_visit", True),
+    ("Where are your locations, what is the price", "projects", False),
+]
+
+FILLER = [
+    "please", "could you", "i was wondering", "thanks", "for my family",
+    "this weekend", "quickly", "in detail", "today", "my friend said",
+]
+
+
+def check_golden_set():
+    failures = []
+    changed = 0
+    for message, expected, differs in GOLDEN_SET:
+        got = detect_intent(message)
+        legacy = legacy_detect_intent(message)
+        if got != expected:
+            failures.append(f"matcher: {message!r} -> {got}, expected {expected}")
+        if not differs and legacy != got:
+            failures.append(f"legacy mismatch: {message!r} -> {legacy}, matcher {got}")
+        if differs and legacy != got:
+            changed += 1
+    return failures, changed
+
+
+def synthetic_messages(count, hit_rate=0.8, filler_words=2, seed=7):
+    rng = random.Random(seed)
+    phrases = [p for patterns in INTENT_PATTERNS.values() for p in patterns]
+    messages = []
+    for _ in range(count):
+        parts = rng.sample(FILLER, filler_words)
+        if rng.random() < hit_rate:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(phrases))
+        messages.append(" ".join(parts).capitalize())
+    return messages
+
+
+# name -> (share of messages containing a pattern, filler phrases per message)
+MIXES = {
+    "short, mostly on-topic": (0.8, 2),
+    "short, off-topic": (0.0, 2),
+    "long, mostly on-topic": (0.8, 6),
+}
+
+
+def throughput(funcs, messages, repeat):
+    """Best messages per second of each function, running them in turn"""
+    best = [0.0] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            start = time.perf_counter()
+            for message in messages:
+                func(message)
+            best[i] = max(best[i], len(messages) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures, changed = check_golden_set()
+    print(f"Golden set: {len(GOLDEN_SET)} messages, "
+          f"{changed} intentionally resolved differently from the legacy loop")
+    if failures:
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        sys.exit(1)
+    print("  all intents match")
+
+    print(f"\nThroughput over {args.messages:,} synthetic messages per mix, "
+          f"best of {args.repeat} runs:")
+    for name, (hit_rate, filler_words) in MIXES.items():
+        messages = synthetic_messages(args.messages, hit_rate, filler_words)
+        legacy_rate, new_rate = throughput([legacy_detect_intent, detect_intent], messages, args.repeat)
+        print(f"  {name}")
+        print(f"    legacy substring loops : {legacy_rate:12,.0f} msg/s")
+        print(f"    precompiled matcher    : {new_rate:12,.0f} msg/s")
+        print(f"    speedup                : {new_rate / legacy_rate:.2f}x")
+
+if __name__ == "__main__":
+    main()
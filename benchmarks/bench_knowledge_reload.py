@@ -0,0 +1,207 @@
+"""
+Benchmark: hot reload of the knowledge file
+
+Copies knowledge.json to a temporary file and serves app.py from it. Then:
+
+- times a full compile (parse, intent matcher, every response rendered) and
+  the swap itself, at the shipped size and with extra projects added;
+- measures the memory one compiled version holds, and the peak while a
+  reload builds the next one next to it;
+- adds a third project to the file while client threads keep posting to
+  /chat, waits for the watcher to pick it up, and checks that no request
+  failed or mixed two versions and that the new project is answered and
+  captured on leads;
+- compares /chat latency with and without a reload every 50 ms.
+
+Run from the repository root:
+    python benchmarks/bench_knowledge_reload.py [--clients 4] [--duration 3]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="neralu-knowledge-")
+KNOWLEDGE_FILE = os.path.join(WORKDIR, "knowledge.json")
+shutil.copy(os.path.join(ROOT, "knowledge.json"), KNOWLEDGE_FILE)
+os.environ["KNOWLEDGE_PATH"] = KNOWLEDGE_FILE
+os.environ["KNOWLEDGE_RELOAD_SECONDS"] = "0.05"
+
+from app import app  # noqa: E402
+from knowledge import KNOWLEDGE, CompiledKnowledge, load_knowledge_file  # noqa: E402
+from router import percentile  # noqa: E402
+
+NEW_PROJECT = {
+    "name": "Coffee Ridge Project",
+    "short_name": "Coffee Ridge",
+    "keywords": ["coffee ridge"],
+    "location": "Hill plots in coffee country",
+    "features": ["Shade-grown coffee", "Pepper vines", "Estate bungalow plots"],
+    "status": "Opening soon"
+}
+MESSAGES = ["Hello", "Which projects do you have?", "What is the price?", "Can I visit?"]
+
+
+def write_atomically(data):
+    """Write a new version the way a deploy should: to a temp file, then rename"""
+    temp = KNOWLEDGE_FILE + ".tmp"
+    with open(temp, "w", encoding="utf-8") as out:
+        json.dump(data, out, ensure_ascii=False, indent=2)
+    os.replace(temp, KNOWLEDGE_FILE)
+
+
+def with_projects(data, extra):
+    data = json.loads(json.dumps(data))
+    for i in range(extra):
+        project = dict(NEW_PROJECT, name=f"Estate {i} Project", short_name=f"Estate {i}",
+                       keywords=[f"estate {i}"])
+        data["knowledge"]["projects"][f"estate_{i}"] = project
+    return data
+
+
+def compile_cost(data, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        CompiledKnowledge(data)
+    return (time.perf_counter() - start) / repeat
+
+
+def swap_cost(repeat=1_000_000):
+    """The swap readers can observe: one attribute assignment"""
+    compiled = KNOWLEDGE.current
+    start = time.perf_counter()
+    for _ in range(repeat):
+        KNOWLEDGE.current = compiled
+    return (time.perf_counter() - start) / repeat
+
+
+def memory_cost(data):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    compiled = CompiledKnowledge(data)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    KNOWLEDGE.path, path = os.path.join(WORKDIR, "sized.json"), KNOWLEDGE.path
+    with open(KNOWLEDGE.path, "w", encoding="utf-8") as out:
+        json.dump(data, out, ensure_ascii=False)
+    KNOWLEDGE.reload()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    KNOWLEDGE.path = path
+    tracemalloc.stop()
+    del compiled
+    return held, peak
+
+
+def client_loop(client_id, stop, latencies, failures, versions):
+    client = app.test_client()
+    number = 0
+    while not stop.is_set():
+        message = MESSAGES[number % len(MESSAGES)]
+        start = time.perf_counter()
+        response = client.post("/chat", json={"message": message, "session_id": f"k{client_id}-{number}"})
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            failures.append(response.status_code)
+        elif message == MESSAGES[1]:
+            # Either the old two-project answer or the new three-project one
+            text = response.get_json()["response"]
+            versions.add("three" if "Coffee Ridge" in text else "two" if "two exciting" in text else text)
+        number += 1
+
+
+def drive(clients, duration, during=None):
+    stop = threading.Event()
+    latencies, failures, versions = [], [], set()
+    threads = [threading.Thread(target=client_loop, args=(i, stop, latencies, failures, versions))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    if during:
+        during(stop, duration)
+    else:
+        time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return latencies, failures, versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3)
+    args = parser.parse_args()
+
+    original = load_knowledge_file(KNOWLEDGE_FILE)
+    try:
+        print("Compile and swap")
+        for extra in (0, 10, 100):
+            data = with_projects(original, extra)
+            size = len(json.dumps(data, ensure_ascii=False).encode())
+            held, peak = memory_cost(data)
+            print(f"  {len(data['knowledge']['projects']):4d} projects, {size / 1024:6.1f} KiB file: "
+                  f"compile {compile_cost(data) * 1000:6.2f} ms, "
+                  f"holds {held / 1024:7.1f} KiB, reload peak {peak / 1024:7.1f} KiB")
+        print(f"  swap (reference assignment): {swap_cost() * 1e9:.0f} ns\n")
+        write_atomically(original)
+        KNOWLEDGE.reload()
+
+        print(f"Adding a project while {args.clients} clients post to /chat")
+        added = json.loads(json.dumps(original))
+        added["knowledge"]["projects"]["coffee_ridge"] = NEW_PROJECT
+        version = KNOWLEDGE.current.version
+        seen = {}
+
+        def add_project(stop, duration):
+            time.sleep(duration / 2)
+            seen["written"] = time.perf_counter()
+            write_atomically(added)
+            while KNOWLEDGE.current.version == version:
+                time.sleep(0.001)
+            seen["live"] = time.perf_counter()
+            time.sleep(duration / 2)
+
+        latencies, failures, versions = drive(args.clients, args.duration, add_project)
+        client = app.test_client()
+        answer = client.post("/chat", json={"message": "Where is Coffee Ridge?", "session_id": "new"}).get_json()
+        client.post("/chat", json={"message": "My name is Asha, 9845012345", "session_id": "new"})
+        lead = client.get("/leads").get_json()["leads"][-1]
+        print(f"  requests {len(latencies)}, failed {len(failures)}, "
+              f"projects answers seen: {sorted(versions)}")
+        print(f"  live {(seen['live'] - seen['written']) * 1000:.0f} ms after the write "
+              f"(watcher polls every {os.environ['KNOWLEDGE_RELOAD_SECONDS']} s)")
+        print(f"  'Where is Coffee Ridge?' -> {answer['intent']}, lead project -> {lead['project']}\n")
+
+        print("/chat latency        p50 ms    p99 ms    max ms")
+        write_atomically(original)
+        KNOWLEDGE.reload()
+        quiet, _, _ = drive(args.clients, args.duration)
+
+        def keep_reloading(stop, duration):
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                KNOWLEDGE.reload()
+                time.sleep(0.05)
+
+        busy, failures, _ = drive(args.clients, args.duration, keep_reloading)
+        for label, values in (("no reloads", quiet), ("reload every 50 ms", busy)):
+            print(f"  {label:<18} {percentile(values, 50) * 1000:8.2f} {percentile(values, 99) * 1000:9.2f} "
+                  f"{values[-1] * 1000:9.2f}")
+        print(f"  failed during reloads: {len(failures)}")
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
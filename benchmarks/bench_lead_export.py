@@ -0,0 +1,93 @@
+"""
+Benchmark: memory and time of /leads as the number of leads grows
+
+Fills a lead store and session store with N leads (4-message conversations
+each) and compares the old single-response /leads (every lead with its
+conversation in one jsonify call) with one paginated page and with the
+streamed NDJSON and CSV exports. Peak memory is measured with tracemalloc.
+
+Run from the repository root:
+    python benchmarks/bench_lead_export.py [--leads 10000 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge import KNOWLEDGE  # noqa: E402
+from lead_store import LeadStore  # noqa: E402
+from leads_api import create_leads_blueprint  # noqa: E402
+from persistence import NullPersistence  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+
+def build_app(count):
+    leads = LeadStore()
+    conversations = SessionStore(max_sessions=count, ttl=0)
+    answer = KNOWLEDGE.current.responses.text("site_visit")
+    for i in range(count):
+        session_id = f"s{i}"
+        session = conversations.get_or_create(session_id)
+        session.append("user", "I want to book a site visit at Korlaparti")
+        session.append("assistant", answer, "site_visit")
+        session.append("user", f"My name is Visitor {i}, 98{i:08d}")
+        session.append("assistant", answer, "site_visit")
+        leads.upsert(session_id, f"Visitor {i}", f"98{i:08d}", "korlaparti" if i % 2 else "sandal_valley")
+
+    app = Flask(__name__)
+    app.register_blueprint(create_leads_blueprint(leads, conversations, NullPersistence()))
+
+    @app.route('/legacy-leads')
+    def legacy_leads():
+        all_leads = []
+        for lead in leads.all():
+            all_leads.append(dict(lead, conversation=conversations.get(lead["session_id"]).history()))
+        return jsonify({"leads": all_leads, "total": len(all_leads)})
+
+    return app
+
+
+def measure(client, url):
+    """(peak traced MiB, seconds, body bytes) for fully reading one response"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leads", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    cases = [
+        ("old /leads (all + conversations)", "/legacy-leads"),
+        ("/leads page of 100", "/leads?limit=100"),
+        ("/leads page, no conversations", "/leads?limit=100&conversations=false"),
+        ("/leads page, one project", "/leads?limit=100&conversations=false&project=korlaparti"),
+        ("/leads/export NDJSON", "/leads/export"),
+        ("/leads/export CSV", "/leads/export?format=csv"),
+        ("/leads/export CSV, one project", "/leads/export?format=csv&project=korlaparti"),
+    ]
+    for count in args.leads:
+        client = build_app(count).test_client()
+        print(f"\n{count:,} leads")
+        print(f"  {'request':<34} {'peak MiB':>9} {'time (ms)':>10} {'body MiB':>9}")
+        for label, url in cases:
+            peak, elapsed, size = measure(client, url)
+            print(f"  {label:<34} {peak:9.2f} {elapsed * 1000:10.1f} {size / 2 ** 20:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: incremental lead extraction vs rescanning the conversation
+
+Simulates long sessions and times the lead-extraction step of each turn:
+the original extract_lead_info, which rescans every user message, against a
+per-session LeadExtractor fed only the newest message.
+
+Run from the repository root:
+    python benchmarks/bench_leads.py [--turns 1000] [--sessions 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lead_capture import LeadExtractor  # noqa: E402
+
+
+def legacy_extract_lead_info(conversation_history):
+    """The original extractor: rescans every user message each turn"""
+    lead_info = {"name": None, "phone": None}
+
+    for msg in conversation_history:
+        if msg["role"] == "user":
+            text = msg["content"]
+
+            phone_pattern = r'(\+?91[-\s]?)?[6-9]\d{9}'
+            phone_match = re.search(phone_pattern, text)
+            if phone_match and not lead_info["phone"]:
+                lead_info["phone"] = phone_match.group()
+
+            if not lead_info["name"]:
+                words = text.split()
+                if len(words) >= 2 and words[0].lower() in ["my", "name", "i'm", "i", "am"]:
+                    potential_name = " ".join(words[1:4])
+                    if len(potential_name) > 2 and not any(char.isdigit() for char in potential_name):
+                        lead_info["name"] = potential_name.strip(".,!?")
+
+    return lead_info
+
+
+MESSAGES = [
+    "Tell me about the sandalwood plantation",
+    "What amenities do you have at Korlaparti?",
+    "How does the managed farmland model work",
+    "Can you share the price range please",
+    "What documents do I get after registration",
+]
+
+
+def session_messages(turns, rng, lead_at=None):
+    messages = [rng.choice(MESSAGES) for _ in range(turns)]
+    if lead_at is not None:
+        messages[lead_at] = "My name is Asha Rao, call me on 9876543210"
+    return messages
+
+
+def run_legacy(messages, checkpoints):
+    history = []
+    timings = {}
+    for turn, text in enumerate(messages, 1):
+        history.append({"role": "user", "content": text})
+        start = time.perf_counter()
+        result = legacy_extract_lead_info(history)
+        timings[turn] = time.perf_counter() - start
+        history.append({"role": "assistant", "content": "..."})
+    return result, {turn: timings[turn] for turn in checkpoints}
+
+
+def run_incremental(messages, checkpoints):
+    extractor = LeadExtractor()
+    timings = {}
+    for turn, text in enumerate(messages, 1):
+        start = time.perf_counter()
+        extractor.feed(text)
+        result = extractor.as_dict()
+        timings[turn] = time.perf_counter() - start
+    return result, {turn: timings[turn] for turn in checkpoints}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    checkpoints = sorted({1, 10, 100, args.turns // 2, args.turns})
+    scenarios = {
+        "no lead in session": None,
+        "lead given at turn 20": 19,
+    }
+
+    for label, lead_at in scenarios.items():
+        legacy_totals = dict.fromkeys(checkpoints, 0.0)
+        new_totals = dict.fromkeys(checkpoints, 0.0)
+        for _ in range(args.sessions):
+            messages = session_messages(args.turns, rng, lead_at)
+            legacy_result, legacy_times = run_legacy(messages, checkpoints)
+            new_result, new_times = run_incremental(messages, checkpoints)
+            # The original extractor knows nothing of projects
+            new_result = {key: new_result[key] for key in legacy_result}
+            if legacy_result != new_result:
+                print(f"FAIL results differ: {legacy_result} vs {new_result}")
+                sys.exit(1)
+            for turn in checkpoints:
+                legacy_totals[turn] += legacy_times[turn]
+                new_totals[turn] += new_times[turn]
+
+        print(f"\n{label} ({args.sessions} sessions x {args.turns} turns), "
+              f"extraction cost per turn:")
+        print(f"  {'turn':>6}  {'rescan (us)':>12}  {'incremental (us)':>17}")
+        for turn in checkpoints:
+            print(f"  {turn:>6}  {legacy_totals[turn] / args.sessions * 1e6:12.2f}  "
+                  f"{new_totals[turn] / args.sessions * 1e6:17.2f}")
+
+
+if __name__ == "__main__":
+    main()
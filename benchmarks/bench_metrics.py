@@ -0,0 +1,87 @@
+"""
+Benchmark: overhead of request instrumentation and the slow-request profiler
+
+Measures the cost per request of the stage timer plus histogram update, the
+time to render /metrics, the share of an app.py /chat request that the
+instrumentation takes, and how much the sampling profiler slows a busy
+request thread at a few sampling intervals.
+
+Run from the repository root:
+    python benchmarks/bench_metrics.py [--requests 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics, SlowRequestProfiler, StageTimer  # noqa: E402
+
+STAGES = ("parse", "session", "detect_intent", "generate_response", "record_reply",
+          "extract_lead_info", "lead_store", "serialize")
+
+
+def instrumentation_cost(requests):
+    metrics = Metrics()
+    start = time.perf_counter()
+    for _ in range(requests):
+        timer = StageTimer()
+        for stage in STAGES:
+            timer.lap(stage)
+        metrics.record("/chat", 200, timer)
+    per_request = (time.perf_counter() - start) / requests
+    start = time.perf_counter()
+    for _ in range(100):
+        metrics.render()
+    return per_request, (time.perf_counter() - start) / 100
+
+
+def chat_cost(requests):
+    import app
+    client = app.app.test_client()
+    messages = ["What is the price?", "Tell me about Korlaparti", "Hello", "Can I visit?"]
+    start = time.perf_counter()
+    for i in range(requests):
+        client.post("/chat", json={"message": messages[i % 4], "session_id": f"m{i % 500}"})
+    return (time.perf_counter() - start) / requests
+
+
+def busy_work(seconds):
+    """Count loop iterations in a fixed time, as a stand-in for request CPU work"""
+    from knowledge import KNOWLEDGE
+    matcher = KNOWLEDGE.current.matcher
+    deadline = time.perf_counter() + seconds
+    done = 0
+    while time.perf_counter() < deadline:
+        matcher.match("Can I book a site visit to Sandal Valley next weekend?")
+        done += 1
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    per_request, render = instrumentation_cost(args.requests)
+    chat = chat_cost(args.requests // 4)
+    print(f"Stage timer, {len(STAGES)} laps + histogram update: {per_request * 1e6:6.2f} µs per request")
+    print(f"/chat (app.py, test client):                   {chat * 1e6:6.1f} µs per request "
+          f"({per_request / chat:.1%} instrumentation)")
+    print(f"/metrics render, 1 endpoint x {len(STAGES)} stages:     {render * 1e3:6.2f} ms\n")
+
+    baseline = busy_work(1.0)
+    print("Sampling profiler on a busy request thread (1 s of intent matching)")
+    print(f"  {'off':<16} {baseline:9,d} matches")
+    for interval_ms in (10, 5, 1):
+        profiler = SlowRequestProfiler(threshold=3600, interval=interval_ms / 1000)
+        profiler.start()
+        done = busy_work(1.0)
+        profiler.stop("/bench", 1.0)
+        print(f"  {f'every {interval_ms} ms':<16} {done:9,d} matches  ({done / baseline - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
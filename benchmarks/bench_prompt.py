@@ -0,0 +1,97 @@
+"""
+Benchmark: prompt tokens per turn, fixed 10-message window vs token budget
+
+Simulates 50-turn sessions with a mix of short and long visitor messages and
+rule-engine-length answers, builds the prompt for every turn with the old
+"system prompt + last 10 messages" slice and with PromptBuilder at a few
+budgets, and reports prompt tokens per turn, the share that is the stable
+system-prompt prefix, and build time.
+
+Run from the repository root:
+    python benchmarks/bench_prompt.py [--sessions 200] [--turns 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge import KNOWLEDGE  # noqa: E402
+from prompt_builder import PromptBuilder, count_message_tokens  # noqa: E402
+from session_store import Session  # noqa: E402
+
+SYSTEM_PROMPT = KNOWLEDGE.current.system_prompt
+RESPONSES = KNOWLEDGE.current.responses
+
+SHORT_MESSAGES = [
+    "Hi", "What is the price?", "Can I visit this weekend?", "Thanks!", "Ok",
+    "Where is Korlaparti?", "Is it RERA approved?", "My name is Kiran, 9845012345",
+]
+LONG_MESSAGES = [
+    "We are a family of four living in Bangalore and have been thinking about buying some "
+    "farmland as a long-term investment, but we are worried about managing it ourselves since "
+    "we both work full time. How does your managed model handle day to day maintenance, "
+    "harvesting and selling of the produce, and what reports would we get?",
+    "I saw your ad about Sandal Valley. My father had a coconut farm years ago and it was a lot "
+    "of trouble with water and labour. What is different here, how is irrigation handled in "
+    "summer, and can we stay on the land for weekends with the kids?",
+]
+
+
+def legacy_messages(session):
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for msg in list(session.messages)[-10:]:
+        messages.append({"role": msg.role, "content": msg.content})
+    return messages
+
+
+def simulate(build, sessions, turns, seed):
+    """Prompt tokens for every turn, plus mean build time in microseconds"""
+    rng = random.Random(seed)
+    answers = [RESPONSES.text(intent) for intent in RESPONSES.intents()]
+    per_turn = [[] for _ in range(turns)]
+    elapsed = 0.0
+    for i in range(sessions):
+        session = Session(f"bench-{i}", max_history=50)
+        for turn in range(turns):
+            pool = LONG_MESSAGES if rng.random() < 0.2 else SHORT_MESSAGES
+            session.append("user", rng.choice(pool))
+            start = time.perf_counter()
+            messages = build(session)
+            elapsed += time.perf_counter() - start
+            per_turn[turn].append(count_message_tokens(messages))
+            session.append("assistant", rng.choice(answers), "general")
+    return per_turn, elapsed / (sessions * turns) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    builders = [("last 10 messages", legacy_messages)]
+    for budget in (1200, 1600, 2000):
+        builders.append((f"budget {budget}", PromptBuilder(SYSTEM_PROMPT, budget=budget).build))
+    prefix_tokens = PromptBuilder(SYSTEM_PROMPT).prefix_tokens
+
+    print(f"{args.sessions} sessions x {args.turns} turns; "
+          f"stable system prompt prefix is {prefix_tokens} tokens\n")
+    checkpoints = [t for t in (1, 5, 10, 25, 50) if t <= args.turns]
+    header = "".join(f"{'turn ' + str(t):>9}" for t in checkpoints)
+    print(f"  {'prompt':<18} {'mean':>6} {'max':>6} {'prefix %':>9}{header} {'build µs':>9}")
+    for label, build in builders:
+        per_turn, build_us = simulate(build, args.sessions, args.turns, seed=5)
+        every = [tokens for turn in per_turn for tokens in turn]
+        mean = statistics.mean(every)
+        columns = "".join(f"{statistics.mean(per_turn[t - 1]):9.0f}" for t in checkpoints)
+        print(f"  {label:<18} {mean:6.0f} {max(every):6d} {prefix_tokens / mean:9.0%}{columns} "
+              f"{build_us:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
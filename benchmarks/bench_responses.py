@@ -0,0 +1,79 @@
+"""
+Benchmark: pre-rendered response registry vs rebuilding every response
+
+Compares the per-request cost of producing a /chat body the old way (render
+all thirteen responses, pick one, serialize with json.dumps) against the
+registry lookup with pre-encoded JSON, and checks both give the same text.
+
+Run from the repository root:
+    python benchmarks/bench_responses.py [--requests 200000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from knowledge import KNOWLEDGE, render_responses  # noqa: E402
+
+RESPONSES = KNOWLEDGE.current.responses
+
+INTENTS = RESPONSES.intents()
+
+
+def legacy_body(intent):
+    """Original path: build every response, return one, serialize it all"""
+    responses = render_responses(KNOWLEDGE.current.knowledge)
+    response = responses.get(intent, responses["general"])
+    return json.dumps({"response": response, "intent": intent, "lead_captured": False}).encode()
+
+
+def registry_body(intent):
+    rendered = RESPONSES.get(intent)
+    return b"".join((
+        b'{"intent":', json.dumps(intent).encode(),
+        b',"lead_captured":', b"false",
+        b',"response":', rendered.json, b"}\n"
+    ))
+
+
+def per_request_us(func, count):
+    start = time.perf_counter()
+    for i in range(count):
+        func(INTENTS[i % len(INTENTS)])
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for intent in INTENTS:
+        if json.loads(legacy_body(intent)) != json.loads(registry_body(intent)):
+            print(f"FAIL body mismatch for intent {intent!r}")
+            sys.exit(1)
+    print(f"Bodies identical for all {len(INTENTS)} intents")
+
+    legacy = per_request_us(legacy_body, args.requests)
+    registry = per_request_us(registry_body, args.requests)
+    print(f"\nResponse + serialization, {args.requests:,} requests:")
+    print(f"  rebuild all responses : {legacy:8.2f} us/request")
+    print(f"  registry lookup       : {registry:8.2f} us/request")
+    print(f"  speedup               : {legacy / registry:.1f}x")
+
+    client = app.test_client()
+    count = min(args.requests, 5_000)
+    start = time.perf_counter()
+    for i in range(count):
+        client.post("/chat", json={"message": "what is the price", "session_id": f"bench-{i}"})
+    elapsed = time.perf_counter() - start
+    print(f"\nEnd-to-end /chat via test client: {elapsed / count * 1e6:.0f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: hybrid rule/LLM routing vs sending every message to the LLM
+
+Replays a mix of typical visitor sessions through advanced_chatbot.py's
+/chat, once with every message going to the LLM and once with the hybrid
+router, and reports the share of LLM calls avoided and the p50/p99 latency.
+The LLM is the local stub; the response cache is bypassed to isolate the
+effect of routing.
+
+Run from the repository root:
+    python benchmarks/bench_router.py [--sessions 40] [--latency 0.3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from router import percentile  # noqa: E402
+from stub_llm import spawn_stub_server  # noqa: E402
+
+# Visitor sessions as they typically unfold; the replay samples from these
+SESSIONS = [
+    ["Hello", "What is managed farmland?", "What is the price?", "Can I visit the farm?",
+     "My name is Kiran, 9845012345"],
+    ["Hi there", "Which plantations do you offer?", "Is sandalwood a good investment over 10 years?",
+     "How is the yield shared with owners?"],
+    ["Tell me about Korlaparti", "How far is it from Bangalore?", "What amenities are there?",
+     "I want to book a site visit"],
+    ["Do you have plots near Mysore?", "What documents do I get?", "Is it RERA registered",
+     "How do I contact you?"],
+    ["Namaste", "What are the benefits?", "Can NRIs buy agricultural land?",
+     "What happens if I want to sell after 5 years?"],
+    ["Where can I book a visit?", "Is there a clubhouse?", "How much does it cost",
+     "I am interested"],
+]
+
+
+def replay(client, sessions, label):
+    latencies = []
+    for index, messages in enumerate(sessions):
+        for message in messages:
+            start = time.perf_counter()
+            response = client.post("/chat", json={
+                "message": message, "session_id": f"{label}-{index}", "cache": False
+            })
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub seconds per completion")
+    args = parser.parse_args()
+
+    stub, url = spawn_stub_server(latency=args.latency)
+    os.environ["LLM_BASE_URL"] = url
+    import advanced_chatbot
+
+    rng = random.Random(11)
+    sessions = [rng.choice(SESSIONS) for _ in range(args.sessions)]
+    total = sum(len(messages) for messages in sessions)
+    client = advanced_chatbot.app.test_client()
+
+    print(f"Replaying {args.sessions} sessions ({total} messages), "
+          f"stub latency {args.latency * 1000:.0f} ms\n")
+    results = {}
+    for label, hybrid in (("LLM only", False), ("hybrid router", True)):
+        advanced_chatbot.HYBRID_ROUTING = hybrid
+        calls_before = advanced_chatbot.llm.stats["calls"]
+        routes_before = dict(advanced_chatbot.router.counts)
+        latencies = replay(client, sessions, label)
+        calls = advanced_chatbot.llm.stats["calls"] - calls_before
+        routes = {route: count - routes_before[route] for route, count in advanced_chatbot.router.counts.items()}
+        results[label] = (calls, latencies, routes)
+        print(f"  {label:<14} LLM calls {calls:4d}/{total}   "
+              f"p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+              f"p99 {percentile(latencies, 99) * 1000:7.1f} ms   "
+              f"total {sum(latencies):6.1f} s")
+
+    llm_calls, llm_latencies, _ = results["LLM only"]
+    hybrid_calls, hybrid_latencies, hybrid_routes = results["hybrid router"]
+    print(f"\n  LLM calls avoided: {1 - hybrid_calls / llm_calls:.0%}")
+    print(f"  p50 change: {percentile(llm_latencies, 50) * 1000:.1f} -> "
+          f"{percentile(hybrid_latencies, 50) * 1000:.1f} ms")
+    print(f"  p99 change: {percentile(llm_latencies, 99) * 1000:.1f} -> "
+          f"{percentile(hybrid_latencies, 99) * 1000:.1f} ms")
+    print(f"  hybrid routes: {hybrid_routes}")
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
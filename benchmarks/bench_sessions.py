@@ -0,0 +1,120 @@
+"""
+Benchmark: memory of the bounded session store vs the unbounded dict
+
+Fills each session storage scheme with the same synthetic traffic in a fresh
+subprocess and reports resident memory (RSS) before and after.
+
+Run from the repository root:
+    python benchmarks/bench_sessions.py [--sessions 100000] [--turns 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESPONSE = "Thanks for asking! Here is what Neralu Farms offers... " * 8
+
+
+def rss_bytes():
+    """Current resident set size, read from /proc on Linux"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def fill_legacy(sessions, turns):
+    conversations = {}
+    for i in range(sessions):
+        session_id = f"session_{i}_abcdefghi"
+        if session_id not in conversations:
+            conversations[session_id] = []
+        for turn in range(turns):
+            conversations[session_id].append({
+                "role": "user",
+                "content": f"question {turn} from visitor {i}",
+                "timestamp": datetime.now().isoformat()
+            })
+            conversations[session_id].append({
+                "role": "assistant",
+                "content": RESPONSE,
+                "timestamp": datetime.now().isoformat(),
+                "intent": "general"
+            })
+    return conversations, {}
+
+
+def fill_store(sessions, turns, max_sessions):
+    from session_store import SessionStore
+
+    store = SessionStore(max_sessions=max_sessions, ttl=1800, max_history=50)
+    for i in range(sessions):
+        session = store.get_or_create(f"session_{i}_abcdefghi")
+        for turn in range(turns):
+            session.append("user", f"question {turn} from visitor {i}")
+            session.append("assistant", RESPONSE, "general")
+    return store, store.stats()
+
+
+def child(scheme, sessions, turns, max_sessions):
+    before = rss_bytes()
+    start = time.perf_counter()
+    if scheme == "legacy":
+        kept, stats = fill_legacy(sessions, turns)
+    else:
+        kept, stats = fill_store(sessions, turns, max_sessions)
+    elapsed = time.perf_counter() - start
+    after = rss_bytes()
+    print(json.dumps({
+        "rss_before": before, "rss_after": after,
+        "seconds": elapsed, "sessions_kept": len(kept), "stats": stats
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.sessions, args.turns, args.max_sessions)
+        return
+
+    schemes = [
+        ("legacy", "dict of lists of dicts, unbounded", args.max_sessions),
+        ("store", "SessionStore, no session cap", args.sessions),
+        ("store", f"SessionStore, max {args.max_sessions:,} sessions", args.max_sessions),
+    ]
+    print(f"{args.sessions:,} sessions x {args.turns} turns "
+          f"({args.sessions * args.turns * 2:,} messages)\n")
+    for scheme, label, max_sessions in schemes:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", scheme,
+             "--sessions", str(args.sessions), "--turns", str(args.turns),
+             "--max-sessions", str(max_sessions)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output)
+        grown = (result["rss_after"] - result["rss_before"]) / 2**20
+        print(f"  {label}")
+        print(f"    RSS {result['rss_before'] / 2**20:7.1f} MiB -> "
+              f"{result['rss_after'] / 2**20:7.1f} MiB (+{grown:.1f} MiB), "
+              f"{result['sessions_kept']:,} sessions kept, {result['seconds']:.2f}s")
+        if result["stats"]:
+            print(f"    evictions: {result['stats']['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
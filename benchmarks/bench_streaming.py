@@ -0,0 +1,95 @@
+"""
+Benchmark: time to first byte of streamed vs buffered /chat replies
+
+Serves app.py and advanced_chatbot.py over real HTTP, points the advanced
+chatbot at the local stub LLM (streaming one word at a time), and measures
+time to first byte and total time with and without "stream": true. The
+advanced chatbot sends every message to the stub: hybrid routing is off
+and requests bypass the response cache.
+
+Run from the repository root:
+    python benchmarks/bench_streaming.py [--requests 10] [--latency 0.3] [--token-interval 0.03]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_llm import spawn_stub_server  # noqa: E402
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(flask_app):
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def measure(client, url, stream, count):
+    """Returns (median TTFB, median total) in milliseconds"""
+    first_bytes, totals = [], []
+    for i in range(count):
+        payload = {"message": "What is managed farmland?", "session_id": f"ttfb-{stream}-{i}",
+                   "stream": stream, "cache": False}
+        start = time.perf_counter()
+        with client.stream("POST", f"{url}/chat", json=payload) as response:
+            first = None
+            lines = []
+            for line in response.iter_lines():
+                if first is None:
+                    first = time.perf_counter() - start
+                if line:
+                    lines.append(json.loads(line))
+        totals.append(time.perf_counter() - start)
+        first_bytes.append(first)
+        if stream:
+            assert lines[-1]["type"] == "done", lines[-1]
+        else:
+            assert lines[0]["response"]
+    return statistics.median(first_bytes) * 1000, statistics.median(totals) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub seconds to first token")
+    parser.add_argument("--token-interval", type=float, default=0.03, help="stub seconds per token")
+    args = parser.parse_args()
+
+    stub, stub_url = spawn_stub_server(latency=args.latency, token_interval=args.token_interval)
+    os.environ["LLM_BASE_URL"] = stub_url
+    # Otherwise the question is answered by the rule engine, not the stub
+    os.environ["HYBRID_ROUTING"] = "0"
+    import advanced_chatbot
+    import app
+
+    print(f"Stub model: {args.latency * 1000:.0f} ms to first token, "
+          f"{args.token_interval * 1000:.0f} ms per token; medians of {args.requests} requests\n")
+    print(f"  {'server':<22} {'mode':<9} {'TTFB (ms)':>10} {'total (ms)':>11}")
+    with httpx.Client(timeout=60) as client:
+        for name, flask_app in (("advanced_chatbot.py", advanced_chatbot.app), ("app.py", app.app)):
+            server, url = serve(flask_app)
+            for stream in (False, True):
+                ttfb, total = measure(client, url, stream, args.requests)
+                print(f"  {name:<22} {'stream' if stream else 'buffered':<9} {ttfb:10.1f} {total:11.1f}")
+            server.shutdown()
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Evaluation: full fact-sheet system prompt vs persona prompt + retrieved facts
+
+Runs a fixed set of visitor questions, some of them follow-ups, through the
+prompt advanced_chatbot.py would send in each mode and reports:
+
+- prompt tokens per question;
+- grounding: the share of the facts each answer needs that reach the
+  model, and the questions missing any. Facts are short phrases, worded so
+  either prompt gets credit when it carries the fact at all;
+- time to build the prompt, retrieval included, and /chat latency against
+  the local stub LLM, which charges --prefill-per-token for every prompt
+  word as a real model does.
+
+Run from the repository root:
+    python benchmarks/eval_retrieval.py [--latency 0.05] [--prefill-per-token 0.0001] [--top-k 4]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_llm import spawn_stub_server  # noqa: E402
+
+# (turns, facts the last answer needs); earlier turns give follow-ups their topic
+QUESTIONS = [
+    (["Tell me about sandalwood"], ["sandalwood", "long-term"]),
+    (["What plantations can I choose from?"], ["mango", "coconut", "timber", "sandalwood"]),
+    (["What timber do you grow?"], ["teak"]),
+    (["Can I grow mangoes?"], ["excellent yield"]),
+    (["Which projects do you have?"], ["Korlaparti Project", "Sandal Valley Project"]),
+    (["Where is Korlaparti?"], ["excellent connectivity"]),
+    (["Is Sandal Valley a gated community?"], ["Gated community"]),
+    (["Are Korlaparti plots available to book right now?"], ["Available for booking"]),
+    (["How much does a plot cost?"], ["payment plans"]),
+    (["Is the land RERA approved?"], ["RERA"]),
+    (["Do I actually own the land?"], ["clear legal title"]),
+    (["How long should I stay invested?"], ["5-15 years"]),
+    (["What kind of returns can I expect?"], ["land appreciation"]),
+    (["Who maintains the farm day to day?"], ["harvesting"]),
+    (["Is there a clubhouse?"], ["Clubhouse"]),
+    (["How is irrigation handled in summer?"], ["Drip irrigation"]),
+    (["Are there any tax benefits?"], ["agricultural land"]),
+    (["Is this an eco-friendly investment?"], ["sustainable"]),
+    (["Is the property secure?"], ["security", "fencing"]),
+    (["What does Neralu stand for?"], ["Sustainability", "Transparency"]),
+    (["How does a site visit work?"], ["visit details"]),
+    (["Tell me about Sandal Valley", "What features does it have?"], ["Luxury farmhouse plots"]),
+    (["I like coconut farming", "What yields does it give?"], ["consistent returns"]),
+    (["What about Korlaparti?", "Does it have water?"], ["Water infrastructure"]),
+]
+
+
+def set_mode(chatbot, retrieval, top_k):
+    chatbot.PROMPT_RETRIEVAL = retrieval
+    chatbot.RETRIEVAL_TOP_K = top_k
+    chatbot.prompt_builder = chatbot.create_prompt_builder(chatbot.KNOWLEDGE.current)
+
+
+def prompts(chatbot):
+    from session_store import Session
+    built = []
+    for number, (turns, facts) in enumerate(QUESTIONS):
+        session = Session(f"eval-{number}", 50)
+        for turn in turns[:-1]:
+            session.append("user", turn)
+            session.append("assistant", "Happy to help with that! 🌿")
+        session.append("user", turns[-1])
+        built.append((turns, facts, chatbot.build_prompt(session, None)))
+    return built
+
+
+def evaluate(chatbot, label, stub_rounds):
+    from prompt_builder import count_message_tokens
+    built = prompts(chatbot)
+    tokens = [count_message_tokens(messages) for _, _, messages in built]
+    found = needed = 0
+    missing = []
+    for turns, facts, messages in built:
+        text = " ".join(msg["content"] for msg in messages).lower()
+        hits = [fact for fact in facts if fact.lower() in text]
+        found += len(hits)
+        needed += len(facts)
+        if len(hits) < len(facts):
+            missing.append(turns[-1])
+
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        prompts(chatbot)
+    build_us = (time.perf_counter() - start) / (rounds * len(QUESTIONS)) * 1e6
+
+    client = chatbot.app.test_client()
+    latencies = []
+    for round_number in range(stub_rounds):
+        for number, (turns, _) in enumerate(QUESTIONS):
+            session_id = f"{label}-{round_number}-{number}"
+            for turn in turns:
+                start = time.perf_counter()
+                client.post("/chat", json={"message": turn, "session_id": session_id, "cache": False})
+                latency = time.perf_counter() - start
+            latencies.append(latency)
+
+    print(f"  {label:<22} {statistics.mean(tokens):7.0f} {max(tokens):6d} "
+          f"{found / needed:9.0%} {len(missing):8d} {build_us:9.1f} "
+          f"{statistics.median(latencies) * 1000:9.1f}")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM seconds per reply")
+    parser.add_argument("--prefill-per-token", type=float, default=0.0001,
+                        help="stub LLM seconds per prompt word")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the questions against the stub")
+    args = parser.parse_args()
+
+    stub, stub_url = spawn_stub_server(latency=args.latency, prefill_per_token=args.prefill_per_token)
+    os.environ.update(LLM_BASE_URL=stub_url, HYBRID_ROUTING="0", KNOWLEDGE_RELOAD_SECONDS="0")
+    try:
+        import advanced_chatbot as chatbot
+
+        print(f"{len(QUESTIONS)} questions, stub LLM {args.latency * 1000:.0f} ms + "
+              f"{args.prefill_per_token * 1e6:.0f} µs per prompt word\n")
+        print(f"  {'prompt':<22} {'tokens':>7} {'max':>6} {'grounded':>9} {'missing':>8} "
+              f"{'prompt µs':>9} {'/chat ms':>9}")
+        set_mode(chatbot, False, args.top_k)
+        full_missing = evaluate(chatbot, "full fact sheet", args.rounds)
+        set_mode(chatbot, True, args.top_k)
+        rag_missing = evaluate(chatbot, f"persona + top-{args.top_k}", args.rounds)
+        for label, missing in (("full fact sheet", full_missing), ("retrieval", rag_missing)):
+            if missing:
+                print(f"\n  facts missing with the {label}:")
+                for question in missing:
+                    print(f"    {question}")
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
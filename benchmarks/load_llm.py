@@ -0,0 +1,122 @@
+"""
+Load test: async LLM backend vs a blocking completion call
+
+Starts the local stub LLM and drives /chat of advanced_chatbot.py from
+--concurrency threads (one per session by default) twice: with the LLM call
+made as a blocking request over one shared, pooled httpx.Client, as
+openai.ChatCompletion.create made it, and through the async backend.
+Everything else on the request path is the same. Reports requests per
+second and latency.
+
+complete_sync still blocks the calling Flask worker thread until its reply
+arrives; only the HTTP I/O runs on the backend's event loop. So at equal
+thread counts the async layer does not add throughput. With many busy
+threads it costs some, since every call's I/O then waits for that one loop
+thread to get the GIL. What it adds is the upstream concurrency cap
+(LLM_MAX_CONCURRENCY), per-attempt timeouts and retries with backoff;
+compare the two rows for its overhead.
+
+The backend's timeout, retry and error handling is covered by
+tests/test_llm_backend.py.
+
+Run from the repository root:
+    python benchmarks/load_llm.py [--sessions 200] [--turns 3] [--latency 0.2] [--concurrency N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_llm import spawn_stub_server  # noqa: E402
+
+def drive(workers, total, call):
+    """Run ``total`` calls on ``workers`` threads; returns (rps, latencies)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        call(i)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(total)))
+    return total / (time.perf_counter() - start), latencies
+
+
+def report(label, rps, latencies):
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {label:<44} {rps:8.1f} req/s   p50 {statistics.median(latencies) * 1000:7.0f} ms"
+          f"   p99 {p99 * 1000:7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per completion")
+    parser.add_argument("--concurrency", type=int,
+                        help="client threads on both paths (default: one per session)")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="LLM_MAX_CONCURRENCY")
+    args = parser.parse_args()
+    concurrency = args.concurrency or args.sessions
+
+    stub, url = spawn_stub_server(latency=args.latency)
+    os.environ["LLM_BASE_URL"] = url
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.max_concurrency)
+    # Every message goes to the LLM
+    os.environ["HYBRID_ROUTING"] = "0"
+    import advanced_chatbot
+
+    total = args.sessions * args.turns
+    print(f"Load: {args.sessions} sessions x {args.turns} turns on {concurrency} threads, "
+          f"stub latency {args.latency * 1000:.0f} ms")
+
+    shared = httpx.Client(timeout=None, limits=httpx.Limits(max_connections=concurrency))
+
+    def blocking_complete(messages):
+        # One synchronous call per request over a pooled client
+        response = shared.post(f"{url}/chat/completions", json={
+            "model": "gpt-4", "messages": messages, "temperature": 0.7, "max_tokens": 500
+        })
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    client = advanced_chatbot.app.test_client()
+
+    def chat_call(i):
+        response = client.post("/chat", json={
+            "message": "What is managed farmland?",
+            "session_id": f"load-{i % args.sessions}",
+            "cache": False
+        })
+        assert "Neralu" in response.json["response"]
+
+    async_complete = advanced_chatbot.llm.complete_sync
+    advanced_chatbot.llm.complete_sync = blocking_complete
+    rps, latencies = drive(concurrency, total, chat_call)
+    report("/chat, blocking call, shared client", rps, latencies)
+
+    advanced_chatbot.llm.complete_sync = async_complete
+    rps, latencies = drive(concurrency, total, chat_call)
+    report(f"/chat, async backend (limit {args.max_concurrency})", rps, latencies)
+    print(f"  backend stats: {advanced_chatbot.llm.stats}")
+    shared.close()
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Load generator: throughput of the production server by worker count
+
+Starts `gunicorn -c gunicorn.conf.py wsgi:application` with 1, 2, ... worker
+processes sharing state through a temporary SQLite file, drives it with
+concurrent multi-turn chat sessions that leave leads, and reports requests
+per second and p50/p99 latency. One in-memory single-worker run is the
+baseline for the cost of shared state. After each run it checks that every
+worker reports the same leads and full conversation histories.
+
+Run from the repository root:
+    python benchmarks/load_wsgi.py [--max-workers 4] [--clients 16] [--duration 10]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from router import percentile  # noqa: E402
+
+TURNS = ["Hello", "What is managed farmland?", "Tell me about Korlaparti",
+         "What is the price?", "I want to book a site visit"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, threads, shared_path, chatbot_app):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               PORT=str(port), HOST="127.0.0.1", GUNICORN_LOG_LEVEL="warning",
+               CHATBOT_APP=chatbot_app)
+    env.pop("SHARED_STATE_PATH", None)
+    if shared_path:
+        env["SHARED_STATE_PATH"] = shared_path
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+        cwd=ROOT, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def client_loop(url, client_id, stop, latencies, sessions):
+    with httpx.Client(timeout=30) as client:
+        number = 0
+        while not stop.is_set():
+            session_id = f"load-{client_id}-{number}"
+            phone = f"9{client_id:03d}{number:06d}"
+            for turn in TURNS + [f"My name is Visitor, {phone}"]:
+                start = time.perf_counter()
+                response = client.post(f"{url}/chat", json={"message": turn, "session_id": session_id})
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+                if stop.is_set():
+                    return
+            sessions.append(session_id)
+            number += 1
+
+
+def check_consistency(url, sessions, workers):
+    """Every completed session has one lead with all 12 messages, as seen
+    from several requests (and so, with luck, several workers)"""
+    expected = set(sessions)
+    for _ in range(max(2, workers * 2)):
+        seen = {}
+        cursor = "0"
+        while cursor is not None:
+            page = httpx.get(f"{url}/leads", params={"cursor": cursor, "limit": 500}, timeout=30).json()
+            for lead in page["leads"]:
+                seen[lead["session_id"]] = len(lead["conversation"])
+            cursor = page["next_cursor"]
+        missing = expected - seen.keys()
+        short = [sid for sid in expected & seen.keys() if seen[sid] != 2 * (len(TURNS) + 1)]
+        if missing or short:
+            return f"{len(missing)} leads missing, {len(short)} conversations incomplete"
+    return "ok"
+
+
+def run(label, workers, threads, shared, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        shared_path = os.path.join(tmp, "state.db") if shared else None
+        process, url = start_server(workers, threads, shared_path, args.app)
+        try:
+            stop = threading.Event()
+            latencies, sessions = [], []
+            clients = [threading.Thread(target=client_loop, args=(url, i, stop, latencies, sessions))
+                       for i in range(args.clients)]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            time.sleep(args.duration)
+            stop.set()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+            consistency = check_consistency(url, sessions, workers) if shared or workers == 1 else "-"
+        finally:
+            process.terminate()
+            process.wait()
+    latencies.sort()
+    print(f"  {label:<24} {len(latencies) / elapsed:8.0f} "
+          f"{percentile(latencies, 50) * 1000:9.1f} {percentile(latencies, 99) * 1000:9.1f}   {consistency}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--app", choices=["app", "advanced"], default="app")
+    args = parser.parse_args()
+
+    print(f"{args.clients} concurrent clients for {args.duration:.0f} s each, "
+          f"{args.threads} threads per worker, {os.cpu_count()} CPU(s)\n")
+    print(f"  {'server':<24} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}   consistency")
+    run("1 worker, in-memory", 1, args.threads, False, args)
+    for workers in range(1, max(1, args.max_workers) + 1):
+        run(f"{workers} worker(s), shared", workers, args.threads, True, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Replay benchmark: multi-turn /chat sessions against both chat servers
+
+Replays recorded or synthetic visitor sessions with a configurable number of
+concurrent visitors against app.py and advanced_chatbot.py, in-process
+through the Flask test client and over real HTTP. Turns within a session are
+sent one after another, as a visitor would. advanced_chatbot.py talks to the
+local stub LLM with the configured latency.
+
+For every server/transport pair it reports throughput, p50/p95/p99 latency,
+errors and the serving process's peak RSS, and it can save the results as
+JSON. With --baseline it compares them with an earlier results file and exits
+with status 1 if any request failed, or if throughput dropped, or latency or
+peak RSS grew, by more than --threshold.
+
+Baselines are machine-specific and are not committed. Record one on the
+machine that runs the comparison, with the same options, as
+benchmarks/baseline.json (ignored by git), and record it again whenever the
+options, the seed or the session generator change.
+
+Sessions come from --sessions: a JSON Lines file of
+{"session_id": ..., "messages": [...]} records, or a SQLite database written
+with PERSISTENCE_BACKEND=sqlite (its user messages are replayed). Without it,
+--synthetic sessions are generated.
+
+Run from the repository root:
+    python benchmarks/replay.py --repeat 3 --output benchmarks/baseline.json
+    python benchmarks/replay.py --repeat 3 --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+from router import percentile  # noqa: E402
+
+TARGETS = {"app": "app", "advanced": "advanced_chatbot"}
+TRANSPORTS = ("client", "http")
+
+# Building blocks for synthetic sessions: an opening, a few questions a rule
+# matches, a few only the LLM can answer, and sometimes contact details
+OPENINGS = ["Hi", "Hello", "Namaste", "Hi there, I saw your ad"]
+CLEAR_QUESTIONS = [
+    "What is managed farmland?", "What is the price?", "Which plantations do you offer?",
+    "Tell me about your projects", "What amenities are there?", "Is the title clear and RERA approved?",
+    "What are the benefits?", "How do I contact you?", "I want to book a site visit",
+]
+OPEN_QUESTIONS = [
+    "Do you allow pets on the farm?", "Can NRIs buy agricultural land?",
+    "What happens if I want to sell after 5 years?", "Is there a school nearby?",
+    "How is the yield shared with owners?", "Can I build a small cottage myself?",
+]
+
+# Metrics checked against the baseline, and which direction is worse;
+# errors are not among them because any error at all is a regression
+COMPARED_METRICS = {
+    "throughput_rps": -1,
+    "p95_ms": 1,
+    "p99_ms": 1,
+    "peak_rss_mib": 1,
+}
+
+
+def synthetic_sessions(count, seed):
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(count):
+        messages = [rng.choice(OPENINGS)]
+        messages += rng.sample(CLEAR_QUESTIONS, rng.randint(1, 4))
+        messages += rng.sample(OPEN_QUESTIONS, rng.randint(0, 2))
+        tail = messages[1:]
+        rng.shuffle(tail)
+        messages[1:] = tail
+        if rng.random() < 0.4:
+            messages.append(f"My name is Visitor {i}, 9{rng.randrange(10 ** 9):09d}")
+        sessions.append({"session_id": f"replay-{i}", "messages": messages})
+    return sessions
+
+
+def load_sessions(path):
+    """Sessions from a replay JSON Lines file or a persistence SQLite database"""
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        conn = sqlite3.connect(path)
+        grouped = {}
+        for session_id, content in conn.execute(
+            "SELECT session_id, content FROM messages WHERE role = 'user' ORDER BY id"
+        ):
+            grouped.setdefault(session_id, []).append(content)
+        conn.close()
+        return [{"session_id": sid, "messages": messages} for sid, messages in grouped.items()]
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(post, sessions, concurrency, stream):
+    """Replay sessions with ``concurrency`` visitors; ``post(payload)`` sends one
+    turn and returns the HTTP status. Returns (latencies, errors, seconds)."""
+    pending = queue.Queue()
+    for session in sessions:
+        pending.put(session)
+    latencies, errors = [], []
+
+    def visitor():
+        while True:
+            try:
+                session = pending.get_nowait()
+            except queue.Empty:
+                return
+            for message in session["messages"]:
+                payload = {"message": message, "session_id": session["session_id"], "stream": stream}
+                start = time.perf_counter()
+                try:
+                    status = post(payload)
+                except Exception as e:
+                    status = repr(e)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=visitor) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def peak_rss_mib(pid=None):
+    """Peak resident set size of a process (this one by default)"""
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_client(target, sessions, concurrency, stream, warmup):
+    module = __import__(TARGETS[target])
+    local = threading.local()
+
+    def post(payload):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = module.app.test_client()
+        response = client.post("/chat", json=payload)
+        response.get_data()
+        return response.status_code
+
+    replay(post, warmup, concurrency, stream)
+    result = replay(post, sessions, concurrency, stream)
+    return result, peak_rss_mib()
+
+
+def run_http(target, sessions, concurrency, stream, warmup):
+    import httpx
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", target],
+        stdout=subprocess.PIPE, text=True, cwd=ROOT
+    )
+    try:
+        url = server.stdout.readline().strip()
+        if not url:
+            raise RuntimeError(f"{target} server did not start")
+        local = threading.local()
+
+        def post(payload):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = httpx.Client(timeout=60)
+            response = client.post(f"{url}/chat", json=payload)
+            return response.status_code
+
+        replay(post, warmup, concurrency, stream)
+        result = replay(post, sessions, concurrency, stream)
+        return result, peak_rss_mib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def serve(target):
+    """Child process: serve one app over HTTP and print its URL"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    module = __import__(TARGETS[target])
+    server = make_server("127.0.0.1", 0, module.app, threaded=True, request_handler=QuietHandler)
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    server.serve_forever()
+
+
+def measure(target, transport, args):
+    """Child process: one server/transport run, printed as a JSON line"""
+    sessions = load_sessions(args.sessions) if args.sessions else synthetic_sessions(args.synthetic, args.seed)
+    # Unmeasured sessions first, so imports, connections and caches are warm
+    warmup = [dict(session, session_id=f"warmup-{session['session_id']}")
+              for session in synthetic_sessions(args.warmup, args.seed + 1)]
+    runner = run_client if transport == "client" else run_http
+    (latencies, errors, elapsed), rss = runner(target, sessions, args.concurrency, args.stream, warmup)
+    latencies.sort()
+    print(json.dumps({
+        "target": target,
+        "transport": transport,
+        "sessions": len(sessions),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mib": round(rss, 1) if rss is not None else None,
+    }))
+
+
+def median_run(runs):
+    """One run whose numbers are the medians of several repeats"""
+    merged = dict(runs[0])
+    for key, value in runs[0].items():
+        if key == "errors":
+            # A failure in any repeat counts; a median would hide it
+            merged[key] = max(run[key] for run in runs)
+        elif isinstance(value, (int, float)):
+            values = sorted(run[key] for run in runs if run[key] is not None)
+            merged[key] = values[len(values) // 2] if values else None
+    return merged
+
+
+def compare(results, baseline, threshold, min_latency_change_ms):
+    """Regressions against a baseline results file, as printable lines.
+
+    Any failed request is a regression, whatever the baseline. Latency
+    must also grow by at least ``min_latency_change_ms``: with many threads
+    sharing the GIL, the tail of sub-millisecond requests swings by whole
+    thread switch intervals between identical runs. Results recorded with
+    different options are not compared at all.
+    """
+    regressions = []
+    for run in results["runs"]:
+        if run["errors"]:
+            regressions.append(f"{run['target']}/{run['transport']} errors: "
+                               f"{run['errors']} of {run['requests']} requests failed")
+
+    options = {key: value for key, value in results["config"].items() if key != "repeat"}
+    recorded = {key: value for key, value in baseline.get("config", {}).items() if key != "repeat"}
+    if options != recorded:
+        regressions.append(f"baseline recorded with {recorded}, not {options}; record it again")
+        return regressions
+
+    previous = {(run["target"], run["transport"]): run for run in baseline["runs"]}
+    for run in results["runs"]:
+        before = previous.get((run["target"], run["transport"]))
+        if before is None:
+            continue
+        for metric, worse in COMPARED_METRICS.items():
+            old, new = before.get(metric), run.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if metric.endswith("_ms") and new - old < min_latency_change_ms:
+                continue
+            if change * worse > threshold:
+                regressions.append(f"{run['target']}/{run['transport']} {metric}: "
+                                   f"{old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--sessions", help="replay JSON Lines file or persistence SQLite database")
+    parser.add_argument("--synthetic", type=int, default=500, help="synthetic sessions to generate")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured sessions replayed first")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent visitors")
+    parser.add_argument("--stream", action="store_true", help="request streamed replies")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM seconds per reply")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-latency-change-ms", type=float, default=25,
+                        help="latency increases smaller than this are never regressions")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per pair; medians are reported")
+    parser.add_argument("--serve", choices=sorted(TARGETS), help=argparse.SUPPRESS)
+    parser.add_argument("--measure", nargs=2, metavar=("TARGET", "TRANSPORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+    if args.measure:
+        return measure(*args.measure, args)
+
+    from stub_llm import spawn_stub_server
+
+    stub, stub_url = spawn_stub_server(latency=args.llm_latency)
+    runs = []
+    print(f"{args.concurrency} concurrent visitors, stub LLM {args.llm_latency * 1000:.0f} ms, "
+          f"{'streamed' if args.stream else 'buffered'} replies\n")
+    print(f"  {'server':<10} {'transport':<10} {'requests':>8} {'errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak RSS':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            for target in args.targets:
+                for transport in args.transports:
+                    # Each run in a fresh process, so peak RSS and warm state are its own
+                    env = dict(os.environ, LLM_BASE_URL=stub_url, PROFILE_DIR=scratch)
+                    env.pop("SHARED_STATE_PATH", None)
+                    command = [sys.executable, os.path.abspath(__file__), "--measure", target, transport,
+                               "--synthetic", str(args.synthetic), "--seed", str(args.seed),
+                               "--warmup", str(args.warmup),
+                               "--concurrency", str(args.concurrency)]
+                    if args.sessions:
+                        command += ["--sessions", os.path.abspath(args.sessions)]
+                    if args.stream:
+                        command.append("--stream")
+                    repeats = []
+                    for _ in range(args.repeat):
+                        output = subprocess.run(command, env=env, cwd=scratch, check=True,
+                                                capture_output=True, text=True).stdout
+                        repeats.append(json.loads(output.strip().splitlines()[-1]))
+                    run = median_run(repeats)
+                    runs.append(run)
+                    rss = f"{run['peak_rss_mib']:.1f} MiB" if run["peak_rss_mib"] is not None else "n/a"
+                    print(f"  {target:<10} {transport:<10} {run['requests']:8d} {run['errors']:6d} "
+                          f"{run['throughput_rps']:8.1f} {run['p50_ms']:8.1f} {run['p95_ms']:8.1f} "
+                          f"{run['p99_ms']:8.1f} {rss:>9}")
+    finally:
+        stub.terminate()
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "concurrency": args.concurrency, "stream": args.stream, "llm_latency": args.llm_latency,
+            "repeat": args.repeat,
+            "sessions": args.sessions or f"synthetic:{args.synthetic}:{args.seed}",
+        },
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_latency_change_ms)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
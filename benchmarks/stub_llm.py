@@ -0,0 +1,198 @@
+"""
+Local stub of an OpenAI-compatible chat completions server
+
+Answers POST /v1/chat/completions after a configurable delay and fails a
+configurable share of requests, so the LLM backend can be exercised and
+load-tested without network access or an API key. With "stream": true the
+reply is sent as server-sent events, one word per event: the first after
+--latency seconds and the rest --token-interval seconds apart.
+--prefill-per-token adds time per prompt word before the first token, as a
+real model spends reading a longer prompt.
+
+Run standalone:
+    python benchmarks/stub_llm.py --port 8001 --latency 0.2 --error-rate 0.05
+then start the advanced chatbot with LLM_BASE_URL=http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Neralu Farms offers fully managed farmland where you own the land and our "
+    "team handles plantation, irrigation and harvesting. Would you like to book "
+    "a site visit to Korlaparti or Sandal Valley? 🌿"
+)
+
+
+class StubConfig:
+    def __init__(self, latency=0.2, jitter=0.0, error_rate=0.0, error_status=503,
+                 token_interval=0.0, prefill_per_token=0.0, seed=None):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.prefill_per_token = prefill_per_token
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.failures += failed
+            return failed
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in request.get("messages", []))
+        time.sleep(config.delay() + config.prefill_per_token * prompt_tokens)
+        if config.should_fail():
+            self._send_json(config.error_status, {"error": {"message": "stub failure"}})
+            return
+
+        words = REPLY.split(" ")
+        if request.get("stream"):
+            self._send_stream(request, words, prompt_tokens)
+            return
+
+        # A non-streamed reply arrives only once every token is generated
+        time.sleep(config.token_interval * (len(words) - 1))
+        self._send_json(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY.split()),
+                      "total_tokens": prompt_tokens + len(REPLY.split())}
+        })
+
+
+    def _send_stream(self, request, words, prompt_tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = b"data: " + (payload if isinstance(payload, bytes) else json.dumps(payload).encode()) + b"\n\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(self.server.config.token_interval)
+            text = word if index == 0 else " " + word
+            send_event({"object": "chat.completion.chunk", "model": request.get("model", "stub"),
+                        "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]})
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_event({"object": "chat.completion.chunk", "choices": [],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                                  "total_tokens": prompt_tokens + len(words)}})
+        send_event(b"[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that is expected here
+        pass
+
+
+def start_stub_server(port=0, **config):
+    """Start the stub in a background thread; returns (server, base_url).
+
+    The stub shares the caller's GIL, which is fine for functional checks.
+    For load tests use ``spawn_stub_server`` so it runs in its own process.
+    """
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.config = StubConfig(**config)
+    thread = threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def spawn_stub_server(latency=0.2, jitter=0.0, error_rate=0.0, token_interval=0.0, prefill_per_token=0.0):
+    """Start the stub in a subprocess; returns (process, base_url)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--port", str(port), "--latency", str(latency),
+         "--jitter", str(jitter), "--error-rate", str(error_rate),
+         "--token-interval", str(token_interval), "--prefill-per-token", str(prefill_per_token)],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub chat completions server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--token-interval", type=float, default=0.0,
+                        help="seconds between generated tokens")
+    parser.add_argument("--prefill-per-token", type=float, default=0.0,
+                        help="seconds per prompt word before the first token")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, token_interval=args.token_interval,
+                                    prefill_per_token=args.prefill_per_token)
+    print(f"Stub LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Neralu Farms AI Chatbot - Gunicorn Configuration
+Used with: gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Processes for CPU-bound rule matching, threads for requests waiting on the LLM
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+worker_class = "gthread"
+
+# Streamed LLM replies can take a while; keep-alive covers the widget's polling
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Each worker imports the app itself, so the persistence writer and LLM
+# event loop threads are started after the fork rather than lost in it
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = "-"
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Per-process memory would give every worker its own sessions and leads
+if workers > 1:
+    os.environ.setdefault('SHARED_STATE_PATH', "neralu_state.db")
@@ -0,0 +1,162 @@
+"""
+Neralu Farms AI Chatbot - Precompiled Intent Matcher
+Compiles every intent pattern into one regular expression so a message is
+scanned exactly once
+"""
+
+import re
+
+TOKEN_PATTERN = re.compile(r"[\w']+")
+
+# Byte table that lowercases ASCII letters and maps every byte TOKEN_PATTERN
+# does not count as part of a word to a space
+SEPARATOR_BYTES = bytes(
+    ord(chr(byte).lower()) if TOKEN_PATTERN.fullmatch(chr(byte)) else ord(" ")
+    for byte in range(128)
+) + bytes(range(128, 256))
+
+# Single-word patterns at least this long also match simple inflections,
+# so "book" still catches "booking" and "visit" catches "visiting"
+INFLECTION_MIN_LENGTH = 4
+INFLECTION_SUFFIXES = ("s", "es", "ed", "ing")
+
+
+def phrase_trie(phrases, separator):
+    """Regex source matching any of the phrases, nested as a character trie
+    so the engine never backtracks over a shared prefix. Longer phrases are
+    tried first, and the space between words matches ``separator``."""
+    root = {}
+    for phrase in phrases:
+        node = root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def branch(node):
+        alternatives = [
+            (separator if char == " " else re.escape(char)) + branch(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if "" in node:
+            alternatives.append("")
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    # With no phrases at all, match nothing rather than the empty string
+    return branch(root) if root else "(?!)"
+
+
+class IntentMatcher:
+    """Match messages against intent patterns in a single pass.
+
+    Every pattern phrase is compiled into one regex, a character trie that
+    only matches whole words, so "hi" never fires inside "this". Matches
+    are found left to right; at each word the longest phrase wins and its
+    words are consumed, so "site visit" is not also counted as "visit".
+
+    ASCII messages, nearly all of them, are lowercased and have punctuation
+    turned into spaces by one bytes.translate call. Their pattern starts
+    with a literal space, so the regex engine jumps from word to word in C
+    and the scan costs no Python work per word. Other messages are matched
+    as lowercased text by an equivalent Unicode pattern.
+
+    Scoring rule: each match adds the length of the matched pattern to its
+    intent's score, so longer, more specific phrases count as stronger
+    evidence than short keywords. The highest score wins; ties go to the
+    intent that appears first in ``priority``.
+    """
+
+    def __init__(self, intent_patterns, priority=None, default="general"):
+        self.default = default
+        self.priority = list(priority or intent_patterns)
+        for intent in intent_patterns:
+            if intent not in self.priority:
+                self.priority.append(intent)
+        self._rank = {intent: rank for rank, intent in enumerate(self.priority)}
+
+        # phrase -> (intent, weight); a phrase listed under several intents
+        # keeps its longest pattern, then the first one listed
+        phrases = {}
+        for intent, patterns in intent_patterns.items():
+            for pattern in patterns:
+                words = TOKEN_PATTERN.findall(pattern.lower())
+                if not words:
+                    continue
+                variants = [words[0]]
+                if len(words) == 1 and len(words[0]) >= INFLECTION_MIN_LENGTH:
+                    variants += [words[0] + suffix for suffix in INFLECTION_SUFFIXES]
+                for variant in variants:
+                    phrase = " ".join([variant] + words[1:])
+                    if phrase not in phrases or len(pattern) > phrases[phrase][1]:
+                        phrases[phrase] = (intent, len(pattern))
+
+        ascii_phrases = [phrase for phrase in phrases if phrase.isascii()]
+        self._phrases = phrases
+        self._ascii_phrases = {phrase.encode(): phrases[phrase] for phrase in ascii_phrases}
+        self._find_ascii = re.compile(
+            (" (" + phrase_trie(ascii_phrases, " +") + ")(?![^ ])").encode()
+        ).findall
+        self._find_unicode = re.compile(
+            r"(?<![\w'])(" + phrase_trie(phrases, r"[^\w']+") + r")(?![\w'])"
+        ).findall
+
+    def _matches(self, message):
+        """Return ``(intent, weight)`` for every phrase found, in order"""
+        if message.isascii():
+            hits = self._find_ascii(b" " + message.encode().translate(SEPARATOR_BYTES))
+            return self._ascii_matches(hits)
+        phrases = self._phrases
+        hits = self._find_unicode(message.lower())
+        # A hit spanning punctuation or extra spaces is looked up normalized
+        return [phrases.get(hit) or phrases[" ".join(TOKEN_PATTERN.findall(hit))] for hit in hits]
+
+    def _ascii_matches(self, hits):
+        phrases = self._ascii_phrases
+        return [phrases.get(hit) or phrases[b" ".join(hit.split())] for hit in hits]
+
+    @staticmethod
+    def _scores(matches):
+        scores = {}
+        for intent, weight in matches:
+            scores[intent] = scores.get(intent, 0) + weight
+        return scores
+
+    def scores(self, message):
+        """Return a dict of intent -> score for every intent that matched"""
+        return self._scores(self._matches(message))
+
+    def classify(self, message):
+        """Return ``(intent, confidence)`` for a message.
+
+        Confidence is the winner's lead over the runner-up as a share of the
+        winner's score: 1.0 when only one intent matched, near 0 when two
+        intents matched about equally, and 0 when nothing matched.
+        """
+        scores = self.scores(message)
+        if not scores:
+            return self.default, 0.0
+        rank = self._rank
+        ordered = sorted(scores, key=lambda intent: (-scores[intent], rank[intent]))
+        top = scores[ordered[0]]
+        runner_up = scores[ordered[1]] if len(ordered) > 1 else 0
+        return ordered[0], (top - runner_up) / top
+
+    def match(self, message):
+        """Return the winning intent for a message"""
+        if message.isascii():
+            # Most messages hit one phrase or none: answer those without
+            # building a list of matches
+            hits = self._find_ascii(b" " + message.encode().translate(SEPARATOR_BYTES))
+            if not hits:
+                return self.default
+            if len(hits) == 1:
+                phrases = self._ascii_phrases
+                return (phrases.get(hits[0]) or phrases[b" ".join(hits[0].split())])[0]
+            scores = self._scores(self._ascii_matches(hits))
+        else:
+            scores = self.scores(message)
+        if not scores:
+            return self.default
+        rank = self._rank
+        return min(scores, key=lambda intent: (-scores[intent], rank[intent]))
@@ -0,0 +1,251 @@
+"""
+Neralu Farms AI Chatbot - Knowledge Base
+Facts, intent patterns and the system prompt, loaded from knowledge.json and
+compiled into the matcher and pre-rendered responses shared by both chat
+servers; edits to the file are swapped in without a restart
+"""
+
+import json
+import os
+import threading
+import time
+
+from intent_matcher import IntentMatcher
+from lead_capture import set_project_keywords
+from response_registry import ResponseRegistry
+from retrieval import Retriever, chunk_knowledge, load_brochures
+
+DEFAULT_KNOWLEDGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge.json")
+
+# Shown before each plantation; other plantations get the seedling
+PLANTATION_ICONS = {"mango": "🥭", "coconut": "🥥", "timber": "🌲", "sandalwood": "🪵"}
+
+COUNT_WORDS = ("no", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+
+
+def load_knowledge_file(path):
+    """Parse a knowledge file: JSON, or YAML (.yaml/.yml) if PyYAML is installed"""
+    with open(path, encoding="utf-8") as source:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("YAML knowledge files need PyYAML: pip install pyyaml") from None
+            return yaml.safe_load(source)
+        return json.load(source)
+
+
+def _text(value):
+    """Long text may be written as a list of lines"""
+    return "\n".join(value) if isinstance(value, list) else value
+
+
+def _join(names, conjunction):
+    """Join names into prose: A, B or C"""
+    if len(names) < 2:
+        return "".join(names)
+    return f"{', '.join(names[:-1])} {conjunction} {names[-1]}"
+
+
+def render_responses(knowledge):
+    """Render the response text for every intent from the knowledge base"""
+    projects = list(knowledge['projects'].values())
+    names = [project.get('short_name', project['name']) for project in projects]
+    count = COUNT_WORDS[len(projects)] if len(projects) < len(COUNT_WORDS) else len(projects)
+    if len(projects) == 2:
+        every, either, choices = "Both projects are", "either project", names + ["Both"]
+    else:
+        every, either, choices = "All our projects are", "any of them", names + ["All"]
+    
+    return {
+        "greeting": f"Hello! 🌿 Welcome to Neralu Farms. I'm here to help you explore our managed farmland opportunities. \n\nHow can I assist you today? You can ask me about:\n• Our managed farmland concept\n• Available projects and plantations\n• Investment benefits and returns\n• Booking a site visit\n\nWhat interests you most?",
+        
+        "about_neralu": f"Neralu Farms (also called Neralu Managed Farms) offers premium managed farmland where you own beautiful agricultural land while we handle everything else! 🌳\n\n**Our Mission:** {knowledge['brand_info']['mission']}\n\n**What makes us special:**\n• You own the land with clear legal titles\n• We manage plantation, maintenance & harvesting\n• Enjoy lifestyle amenities + long-term returns\n• Sustainable, nature-focused investment\n\nWould you like to know more about our projects or how managed farmland works?",
+        
+        "managed_farmland": f"Great question! Let me explain how Neralu's managed farmland works: 🌾\n\n**The Concept:**\n{knowledge['concept']['managed_farmland']}\n\n**Ownership Model:**\n{knowledge['concept']['ownership_model']}\n\n**Key Benefits:**\n" + "\n".join([f"✓ {benefit}" for benefit in knowledge['concept']['benefits']]) + "\n\nIt's perfect for those who want farmland ownership without the hassle of daily management!\n\nWould you like to know about our plantation options or current projects?",
+        
+        "plantations": "We offer diverse plantation options at Neralu Farms! 🌱\n\n**Available Plantations:**\n\n" + "\n\n".join([f"{PLANTATION_ICONS.get(key, '🌱')} **{key.title()}:** {text}" for key, text in knowledge['plantations'].items()]) + "\n\nEach plantation is professionally managed with optimal care for maximum yields. Which plantation interests you most?",
+        
+        "projects": f"We have {count} exciting projects available! 🏞️\n\n" + "\n\n".join([f"**{number}. {project['name']}**\nLocation: {project['location']}\nHighlights: {', '.join(project['features'])}" for number, project in enumerate(projects, 1)]) + f"\n\n{every} thoughtfully planned with excellent connectivity and premium amenities. Would you like detailed information about {either}?",
+        
+        "benefits": f"Investing in Neralu Farms offers multiple advantages! 💰🌿\n\n**Financial Benefits:**\n• Passive income from plantation yields\n• Land appreciation over 5-15 years\n• Tax benefits on agricultural land\n• Diversification of investment portfolio\n\n**Lifestyle Benefits:**\n• Your own weekend farmhouse getaway\n• Fresh organic produce\n• Connect with nature\n• Community of like-minded investors\n\n**Peace of Mind:**\n• Professional management included\n• Clear legal documentation\n• Sustainable & eco-friendly\n• Long-term wealth creation\n\n{knowledge['investment']['returns']}\n\nWould you like to discuss investment timelines or book a site visit?",
+        
+        "amenities": f"Neralu Farms comes with excellent infrastructure and lifestyle amenities! 🏡\n\n**Infrastructure:**\n" + "\n".join([f"✓ {item}" for item in knowledge['amenities']['infrastructure']]) + "\n\n**Lifestyle Amenities:**\n" + "\n".join([f"✓ {item}" for item in knowledge['amenities']['lifestyle']]) + f"\n\n**Maintenance:**\n{knowledge['amenities']['maintenance']}\n\nEverything is designed for your convenience and comfort. Would you like to see this in person with a site visit?",
+        
+        "pricing": f"I'd be happy to discuss pricing with you! 💼\n\nOur farmland pricing varies based on:\n• Project location ({_join(names, 'or')})\n• Plot size and layout\n• Plantation type chosen\n• Current offers and payment plans\n\nFor the most accurate and up-to-date pricing, I recommend:\n1. **Booking a site visit** - See the property and get detailed pricing\n2. **Speaking with our sales team** - They can share current rates and special offers\n\nWe also offer flexible payment plans to make your investment easier.\n\nWould you like me to help you schedule a site visit or connect you with our team?",
+        
+        "site_visit": f"Wonderful! A site visit is the best way to experience Neralu Farms! 🚗\n\nDuring your visit, you'll:\n✓ Tour the actual farmland\n✓ See infrastructure and amenities\n✓ Meet our farm management team\n✓ Understand plantation options\n✓ Get detailed pricing and documentation\n✓ See sample farmhouses (if available)\n\n**To book your site visit, I'll need:**\n• Your name\n• Phone number\n• Preferred project ({' / '.join(choices)})\n• Preferred date/time\n\nWould you like to share these details now so I can arrange your visit?",
+        
+        "booking": "That's exciting! Thank you for your interest in Neralu Farms! 🎉\n\nHere's how the booking process works:\n\n**Step 1:** Site Visit (if not done already)\n**Step 2:** Select your preferred project and plot\n**Step 3:** Documentation and verification\n**Step 4:** Payment plan discussion\n**Step 5:** Agreement signing and registration\n**Step 6:** Plantation begins!\n\nTo get started, I can:\n1. Schedule a site visit for you\n2. Connect you with our sales team\n3. Share project brochures and details\n\nMay I have your name and phone number to help you proceed?",
+        
+        "legal": f"Legal clarity is a priority at Neralu! 📄\n\n**Legal Aspects:**\n{knowledge['investment']['legal']}\n\n**What you get:**\n✓ Clear and marketable title\n✓ Sale deed in your name\n✓ All necessary government approvals\n✓ Transparent documentation\n✓ Legal due diligence support\n\nWe believe in complete transparency and legal compliance. Our team can walk you through all documentation during your site visit.\n\nWould you like to schedule a visit or speak with our legal team?",
+        
+        "contact": "I'm here to help, but for detailed assistance, here's how you can reach Neralu Farms: 📞\n\n**Contact Options:**\n• I can collect your details and have our team call you\n• You can request a site visit and meet the team in person\n• For immediate queries, share your question and I'll do my best to help\n\nWould you like me to have our team contact you? If yes, please share:\n• Your name\n• Phone number\n• Best time to call",
+        
+        "general": f"I'm here to help you with information about Neralu Farms! 🌿\n\nI can assist you with:\n• Understanding managed farmland concept\n• Details about our projects ({' & '.join(names) if len(names) == 2 else ', '.join(names)})\n• Plantation options ({', '.join(key.title() for key in knowledge['plantations'])})\n• Investment benefits and returns\n• Amenities and infrastructure\n• Booking site visits\n• Legal and documentation info\n\nWhat would you like to know more about?"
+    }
+
+
+class CompiledKnowledge:
+    """One version of the knowledge file and everything built from it.
+
+    Compiling renders every response and builds the intent matcher, so a
+    version is complete before anyone sees it. Request handlers read
+    ``KNOWLEDGE.current`` once and use that object to the end, so a reload
+    in the middle of a request never mixes two versions.
+
+    A project's ``keywords`` (default: its ``short_name``) are how visitors
+    name it; they are added to the ``projects`` intent and used by lead
+    capture, so a new project only needs its entry under ``projects``.
+    ``brochures`` are glob patterns of text files, relative to the knowledge
+    file, whose paragraphs join the knowledge base in retrieval.
+    """
+
+    def __init__(self, data, version=1, signature=None, base_dir="."):
+        self.version = version
+        self.signature = signature
+        self.knowledge = data["knowledge"]
+        self.system_prompt = _text(data.get("system_prompt", ""))
+        # Without the fact sheet; retrieval supplies the facts per question
+        self.persona_prompt = _text(data.get("persona_prompt") or self.system_prompt)
+
+        # Indexes: project key -> project, visitor phrase -> project key
+        self.projects = self.knowledge["projects"]
+        self.project_keywords = {}
+        for key, project in self.projects.items():
+            for keyword in project.get("keywords") or [project.get("short_name", key.replace("_", " "))]:
+                self.project_keywords[keyword.lower()] = key
+
+        self.intent_patterns = {intent: list(patterns) for intent, patterns in data["intent_patterns"].items()}
+        project_patterns = self.intent_patterns.setdefault("projects", [])
+        project_patterns.extend(k for k in self.project_keywords if k not in project_patterns)
+
+        self.matcher = IntentMatcher(self.intent_patterns, data.get("intent_priority"))
+        self.responses = ResponseRegistry(render_responses, self.knowledge)
+        self.retriever = Retriever(
+            chunk_knowledge(self.knowledge) + load_brochures(data.get("brochures", []), base_dir),
+            self.matcher, self.intent_patterns
+        )
+
+
+class KnowledgeBase:
+    """The current compiled version of a knowledge file.
+
+    ``current`` is a plain attribute that a reload replaces in one
+    assignment once the new version is fully compiled: readers never wait
+    and never see a half-built version. ``watch()`` starts a daemon thread
+    that reloads whenever the file's size or modification time changes. A
+    file that fails to parse or compile, or that a listener rejects, is
+    reported and the previous version stays in service.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error = None
+        self.last_compile_seconds = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        # A broken file at startup is fatal; later ones are not
+        self.current = self._compile(1)
+
+    @classmethod
+    def from_env(cls):
+        """Knowledge from KNOWLEDGE_PATH, watched every KNOWLEDGE_RELOAD_SECONDS (0 disables)"""
+        knowledge = cls(os.getenv('KNOWLEDGE_PATH', DEFAULT_KNOWLEDGE_PATH))
+        interval = float(os.getenv('KNOWLEDGE_RELOAD_SECONDS', '2'))
+        if interval > 0:
+            knowledge.watch(interval)
+        return knowledge
+
+    def _signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _compile(self, version):
+        # Taken before reading, so a write that is still going on shows up
+        # as a change on the next check
+        signature = self._signature()
+        started = time.perf_counter()
+        compiled = CompiledKnowledge(load_knowledge_file(self.path), version, signature,
+                                     os.path.dirname(os.path.abspath(self.path)))
+        self.last_compile_seconds = time.perf_counter() - started
+        return compiled
+
+    def on_swap(self, listener):
+        """Call ``listener(compiled)`` now and with every version swapped in"""
+        self._listeners.append(listener)
+        listener(self.current)
+
+    def reload(self):
+        """Compile the file and swap it in; returns False if it failed.
+
+        Listeners see the new version before ``current`` does. If one of
+        them rejects it (e.g. a persona prompt too long for the prompt
+        budget), those already called are given the previous version
+        again and the previous version stays in service.
+        """
+        with self._lock:
+            previous = self.current
+            try:
+                compiled = self._compile(previous.version + 1)
+            except (OSError, ValueError, LookupError, TypeError, AttributeError, RuntimeError) as e:
+                self._failed(e)
+                return False
+            called = []
+            try:
+                for listener in self._listeners:
+                    listener(compiled)
+                    called.append(listener)
+            except Exception as e:
+                for listener in called:
+                    listener(previous)
+                self._failed(e)
+                return False
+            self.current = compiled
+            self.reloads += 1
+            self.last_error = None
+        return True
+
+    def _failed(self, error):
+        self.reload_errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        print(f"Knowledge Reload Error: {self.last_error}")
+
+    def watch(self, interval=2.0):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="knowledge-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        seen = self.current.signature
+        while True:
+            time.sleep(interval)
+            try:
+                signature = self._signature()
+            except OSError:
+                continue
+            if signature != seen:
+                seen = signature
+                try:
+                    self.reload()
+                except Exception as e:
+                    # Never let the watcher die: later edits must still load
+                    self._failed(e)
+
+    def stats(self):
+        return {
+            "knowledge_version": self.current.version,
+            "knowledge_reloads": self.reloads,
+            "knowledge_reload_errors": self.reload_errors,
+            "knowledge_last_error": self.last_error
+        }
+
+
+# Loaded at import and watched for edits (KNOWLEDGE_PATH, KNOWLEDGE_RELOAD_SECONDS)
+KNOWLEDGE = KnowledgeBase.from_env()
+
+# Lead capture recognises the projects in the current version
+KNOWLEDGE.on_swap(lambda compiled: set_project_keywords(compiled.project_keywords))
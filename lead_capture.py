@@ -0,0 +1,73 @@
+"""
+Neralu Farms AI Chatbot - Incremental Lead Extraction
+Keeps per-session lead state so each turn only scans the newest message
+"""
+
+import re
+
+# Indian mobile number, optionally prefixed with +91 / 91
+PHONE_PATTERN = re.compile(r'(\+?91[-\s]?)?[6-9]\d{9}')
+
+# First words that introduce a name: "my name is ...", "I'm ...", "I am ..."
+NAME_PREFIXES = frozenset(["my", "name", "i'm", "i", "am"])
+
+# Phrases naming a project, mapped to its key in the knowledge base; set by
+# knowledge.py from the current version of the knowledge file
+PROJECT_KEYWORDS = {}
+
+
+def set_project_keywords(keywords):
+    """Replace the project phrases; extractors pick them up on their next message"""
+    global PROJECT_KEYWORDS
+    PROJECT_KEYWORDS = dict(keywords)
+
+
+class LeadExtractor:
+    """Lead information found so far in one conversation.
+
+    Feed user messages in order with ``feed()``. The first phone number and
+    name found are kept, and once both are known messages are no longer
+    scanned for them. The project of interest is tracked separately: each
+    message is checked for project phrases until one is found.
+    """
+
+    __slots__ = ("name", "phone", "project")
+
+    def __init__(self):
+        self.name = None
+        self.phone = None
+        self.project = None
+
+    @property
+    def complete(self):
+        return bool(self.name and self.phone)
+
+    def feed(self, text):
+        """Scan one new user message for a project, a phone number and a name"""
+        # Project of interest, e.g. "I'd like to see Sandal Valley"
+        if not self.project:
+            lowered = text.lower()
+            for keyword, project in PROJECT_KEYWORDS.items():
+                if keyword in lowered:
+                    self.project = project
+                    break
+
+        if self.complete:
+            return
+
+        # Extract phone number (Indian format)
+        if not self.phone:
+            phone_match = PHONE_PATTERN.search(text)
+            if phone_match:
+                self.phone = phone_match.group()
+
+        # Extract name (simple heuristic)
+        if not self.name:
+            words = text.split()
+            if len(words) >= 2 and words[0].lower() in NAME_PREFIXES:
+                potential_name = " ".join(words[1:4])
+                if len(potential_name) > 2 and not any(char.isdigit() for char in potential_name):
+                    self.name = potential_name.strip(".,!?")
+
+    def as_dict(self):
+        return {"name": self.name, "phone": self.phone, "project": self.project}
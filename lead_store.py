@@ -0,0 +1,118 @@
+"""
+Neralu Farms AI Chatbot - Indexed Lead Store
+Captured leads with hash indexes on normalized phone number and session id
+"""
+
+import re
+import threading
+from datetime import datetime
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to its 10 national digits, dropping +91 / 91"""
+    digits = NON_DIGITS.sub("", phone or "")
+    if len(digits) > 10 and digits.startswith("91"):
+        digits = digits[2:]
+    return digits[-10:]
+
+
+class LeadStore:
+    """Insertion-ordered leads with O(1) dedupe and upsert.
+
+    Each lead is a plain dict holding the contact details and the id of the
+    session it came from. The conversation itself stays in the session
+    store and is looked up when leads are exported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leads = []
+        self._by_phone = {}
+        self._by_session = {}
+
+    def upsert(self, session_id, name, phone, project=None):
+        """Record a lead, merging with any lead for the same phone or session.
+
+        Returns ``(lead, changed)``, where ``changed`` is True if the lead
+        was created or updated by this call.
+        """
+        key = normalize_phone(phone)
+        with self._lock:
+            lead = self._by_phone.get(key) or self._by_session.get(session_id)
+            if lead is not None:
+                self._by_session.setdefault(session_id, lead)
+                changed = False
+                if name and not lead["name"]:
+                    lead["name"] = name
+                    changed = True
+                if project and not lead.get("project"):
+                    lead["project"] = project
+                    changed = True
+                return lead, changed
+
+            lead = {
+                "name": name,
+                "phone": phone,
+                "project": project,
+                "session_id": session_id,
+                "captured_at": datetime.now().isoformat()
+            }
+            self._add(key, lead)
+            return lead, True
+
+    def restore(self, stored_leads):
+        """Load previously persisted leads, e.g. at startup"""
+        with self._lock:
+            for lead in stored_leads:
+                key = normalize_phone(lead["phone"])
+                if key not in self._by_phone:
+                    self._add(key, dict(lead))
+
+    def _add(self, key, lead):
+        self._leads.append(lead)
+        self._by_phone[key] = lead
+        self._by_session.setdefault(lead["session_id"], lead)
+
+    def get_by_phone(self, phone):
+        return self._by_phone.get(normalize_phone(phone))
+
+    def get_by_session(self, session_id):
+        return self._by_session.get(session_id)
+
+    def page(self, cursor=0, limit=100, match=None):
+        """Up to ``limit`` leads from position ``cursor`` on, in capture order.
+
+        ``match``, if given, is a predicate leads must satisfy. Returns
+        ``(leads, next_cursor)``; ``next_cursor`` is None after the last
+        lead. Leads are only ever appended, so positions are stable cursors.
+        """
+        found = []
+        with self._lock:
+            stored = self._leads
+            position = cursor
+            while position < len(stored) and len(found) < limit:
+                lead = stored[position]
+                position += 1
+                if match is None or match(lead):
+                    found.append(dict(lead))
+            return found, (position if position < len(stored) else None)
+
+    def all(self):
+        """Snapshot of every lead in capture order"""
+        with self._lock:
+            return list(self._leads)
+
+    def count(self, match=None):
+        """Number of leads, or of those ``match`` accepts"""
+        with self._lock:
+            if match is None:
+                return len(self._leads)
+            return sum(1 for lead in self._leads if match(lead))
+
+    def __len__(self):
+        return len(self._leads)
+
+    def __iter__(self):
+        return iter(self.all())
@@ -0,0 +1,230 @@
+"""
+Neralu Farms AI Chatbot - Leads API
+Paginated, filterable /leads and a streamed NDJSON/CSV export, shared by the
+rule-based and LLM chat servers
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from streaming import NDJSON_MIMETYPE
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Leads fetched from the store per step of an export
+EXPORT_BATCH_SIZE = 500
+
+CSV_COLUMNS = ("name", "phone", "project", "session_id", "captured_at")
+
+# Leading characters that make spreadsheets read a cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+TRUE_VALUES = frozenset(["1", "true", "yes"])
+FALSE_VALUES = frozenset(["0", "false", "no"])
+
+
+class BadRequest(ValueError):
+    """Invalid query parameter, reported to the client as a 400"""
+
+
+def _flag(args, name, default=None):
+    value = args.get(name)
+    if value is None or value == "":
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise BadRequest(f"{name} must be true or false")
+
+
+def csv_safe(lead):
+    """CSV row of a lead with visitor-supplied text that a spreadsheet would
+    run as a formula prefixed with ``'``, so it shows as plain text"""
+    row = {}
+    for column in CSV_COLUMNS:
+        value = lead.get(column)
+        if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+            value = "'" + value
+        row[column] = value
+    return row
+
+
+def _timestamp(args, name):
+    """An ISO date or timestamp parameter in ``captured_at``'s format
+    (naive local time), or None"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an ISO date or timestamp, e.g. 2026-10-01 or 2026-10-01T09:30")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
+class LeadFilter:
+    """Predicate over lead dicts for the since/until/project/has_name
+    filters, which can also be applied in SQL by ``sql()``"""
+
+    __slots__ = ("since", "until", "project", "has_name")
+
+    def __init__(self, since=None, until=None, project=None, has_name=None):
+        self.since = since
+        self.until = until
+        self.project = project
+        self.has_name = has_name
+
+    def __call__(self, lead):
+        captured_at = lead["captured_at"]
+        if self.since is not None and captured_at < self.since:
+            return False
+        if self.until is not None and captured_at >= self.until:
+            return False
+        if self.project is not None and lead.get("project") != self.project:
+            return False
+        if self.has_name is not None and bool(lead["name"]) != self.has_name:
+            return False
+        return True
+
+    def sql(self):
+        """``(where, params)`` selecting the same leads from a table with
+        ``captured_at``, ``project`` and ``name`` columns"""
+        clauses, params = [], []
+        if self.since is not None:
+            clauses.append("captured_at >= ?")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("captured_at < ?")
+            params.append(self.until)
+        if self.project is not None:
+            clauses.append("project = ?")
+            params.append(self.project)
+        if self.has_name is not None:
+            clauses.append("COALESCE(name, '') != ''" if self.has_name else "COALESCE(name, '') = ''")
+        return " AND ".join(clauses) or "1", params
+
+
+def lead_filter(args):
+    """``LeadFilter`` for the since/until/project/has_name query parameters, or None.
+
+    ``since`` and ``until`` are ISO timestamps compared with ``captured_at``
+    (``until`` is exclusive); a date such as 2026-10-01 works too, and a
+    timestamp with an offset is converted to local time.
+    """
+    since = _timestamp(args, "since")
+    until = _timestamp(args, "until")
+    project = args.get("project") or None
+    has_name = _flag(args, "has_name")
+    if since is None and until is None and project is None and has_name is None:
+        return None
+    return LeadFilter(since, until, project, has_name)
+
+
+def create_leads_blueprint(leads, conversations, persistence):
+    """Blueprint serving ``leads`` with conversations from the session store,
+    falling back to ``persistence`` for sessions no longer in memory"""
+    blueprint = Blueprint("leads", __name__)
+
+    def conversation_for(session_id):
+        session = conversations.get(session_id)
+        if session is not None:
+            return session.history()
+        return [msg.to_dict() for msg in persistence.load_session(session_id)]
+
+    def with_conversation(lead):
+        lead = dict(lead)
+        lead.setdefault("project", None)
+        lead["conversation"] = conversation_for(lead["session_id"])
+        return lead
+
+    @blueprint.errorhandler(BadRequest)
+    def bad_request(error):
+        return jsonify({"error": str(error)}), 400
+
+    @blueprint.route('/leads', methods=['GET'])
+    def get_leads():
+        """One page of captured leads (admin endpoint).
+
+        Query parameters: ``cursor`` (from the previous page's
+        ``next_cursor``), ``limit``, the filters of ``lead_filter`` and
+        ``conversations=false`` to leave conversation history out.
+        ``total`` counts every lead matching the filters, across pages.
+        """
+        try:
+            cursor = int(request.args.get("cursor", 0))
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise BadRequest("cursor and limit must be integers")
+        if cursor < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise BadRequest(f"cursor must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+
+        match = lead_filter(request.args)
+        page, next_cursor = leads.page(cursor, limit, match)
+        if _flag(request.args, "conversations", True):
+            page = [with_conversation(lead) for lead in page]
+        return jsonify({
+            "leads": page,
+            "count": len(page),
+            "total": leads.count(match),
+            "next_cursor": None if next_cursor is None else str(next_cursor)
+        })
+
+    @blueprint.route('/leads/export', methods=['GET'])
+    def export_leads():
+        """Every matching lead as streamed NDJSON (default) or CSV.
+
+        Leads are read from the store a batch at a time and written out as
+        they are read, so memory use does not grow with the number of leads.
+        ``conversations=true`` adds history to NDJSON lines.
+        """
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in ("ndjson", "csv"):
+            raise BadRequest("format must be ndjson or csv")
+        match = lead_filter(request.args)
+        include_conversations = _flag(request.args, "conversations", False)
+
+        def batches():
+            cursor = 0
+            while cursor is not None:
+                batch, cursor = leads.page(cursor, EXPORT_BATCH_SIZE, match)
+                if batch:
+                    yield batch
+
+        if export_format == "csv":
+            def rows():
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, CSV_COLUMNS)
+                writer.writeheader()
+                for batch in batches():
+                    writer.writerows(csv_safe(lead) for lead in batch)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue()
+
+            body, mimetype = rows(), "text/csv"
+        else:
+            def lines():
+                for batch in batches():
+                    if include_conversations:
+                        batch = [with_conversation(lead) for lead in batch]
+                    yield "".join(json.dumps(lead, separators=(",", ":")) + "\n" for lead in batch)
+
+            body, mimetype = lines(), NDJSON_MIMETYPE
+
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=leads.{export_format}"}
+        )
+
+    return blueprint
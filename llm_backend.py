@@ -0,0 +1,268 @@
+"""
+Neralu Farms AI Chatbot - Async LLM Backend
+Talks to any OpenAI-compatible chat completions API over a pooled async
+HTTP client, with timeouts, a concurrency limit and retries
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import queue
+import random
+import threading
+
+import httpx
+
+# Upstream statuses worth retrying; everything else fails immediately
+RETRY_STATUSES = frozenset([408, 409, 429, 500, 502, 503, 504])
+
+
+class LLMError(Exception):
+    """The LLM backend could not produce a completion"""
+
+
+class BackgroundLoop:
+    """An asyncio event loop running in a daemon thread.
+
+    Flask views are synchronous, so they submit coroutines here and wait on
+    the result. All requests share this one loop, which means they also
+    share its connection pool and concurrency limit.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and block until it finishes"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class AsyncLLMBackend:
+    """Chat completions client with pooling, timeouts, limits and retries.
+
+    At most ``max_concurrency`` upstream calls are in flight at once; extra
+    callers wait their turn instead of opening more connections. Each
+    attempt is bounded by ``timeout`` seconds. Timeouts, connection errors
+    and retryable statuses are retried up to ``max_retries`` times with
+    full-jitter exponential backoff.
+    """
+
+    def __init__(self, base_url="https://api.openai.com/v1", api_key=None, model="gpt-4",
+                 timeout=20.0, max_concurrency=32, max_retries=2, backoff_base=0.25,
+                 backoff_max=4.0, temperature=0.7, max_tokens=500):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        self.stats = {"calls": 0, "retries": 0, "errors": 0}
+        self._client = None
+        self._semaphore = None
+        self._runner = None
+        self._runner_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a backend from LLM_* / OPENAI_API_KEY environment variables"""
+        return cls(
+            base_url=os.getenv('LLM_BASE_URL', 'https://api.openai.com/v1'),
+            api_key=os.getenv('OPENAI_API_KEY'),
+            model=os.getenv('LLM_MODEL', 'gpt-4'),
+            timeout=float(os.getenv('LLM_TIMEOUT_SECONDS', '20')),
+            max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '32')),
+            max_retries=int(os.getenv('LLM_MAX_RETRIES', '2'))
+        )
+
+    def _ensure_client(self):
+        # Created lazily so they bind to the loop that actually runs the calls
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def complete(self, messages):
+        """Return the assistant reply for a list of chat messages"""
+        client = self._ensure_client()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+
+        async with self._semaphore:
+            self.stats["calls"] += 1
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await client.post("/chat/completions", json=payload)
+                    if response.status_code in RETRY_STATUSES:
+                        raise LLMError(f"upstream returned HTTP {response.status_code}")
+                    response.raise_for_status()
+                    data = response.json()
+                    break
+                except (httpx.TransportError, LLMError) as e:
+                    # TransportError covers timeouts and connection failures
+                    if attempt == self.max_retries:
+                        self.stats["errors"] += 1
+                        raise LLMError(f"completion failed after {attempt + 1} attempts: {e}") from e
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                except (httpx.HTTPError, ValueError) as e:
+                    self.stats["errors"] += 1
+                    raise LLMError(f"completion failed: {e}") from e
+
+        usage = data.get("usage") or {}
+        for key in self.usage:
+            self.usage[key] += usage.get(key, 0)
+        try:
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError) as e:
+            self.stats["errors"] += 1
+            raise LLMError(f"malformed completion response: {e}") from e
+
+    async def stream(self, messages):
+        """Yield the assistant reply piece by piece as the upstream sends it.
+
+        Uses server-sent events from the ``stream`` option of the API. Failed
+        attempts are retried like ``complete()`` only while nothing has been
+        yielded yet; after the first piece an error is raised to the caller.
+        """
+        client = self._ensure_client()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+
+        async with self._semaphore:
+            self.stats["calls"] += 1
+            started = False
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with client.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code in RETRY_STATUSES:
+                            raise LLMError(f"upstream returned HTTP {response.status_code}")
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            event = json.loads(data)
+                            usage = event.get("usage") or {}
+                            for key in self.usage:
+                                self.usage[key] += usage.get(key, 0)
+                            for choice in event.get("choices") or ():
+                                text = (choice.get("delta") or {}).get("content")
+                                if text:
+                                    started = True
+                                    yield text
+                    return
+                except (httpx.TransportError, LLMError) as e:
+                    if started or attempt == self.max_retries:
+                        self.stats["errors"] += 1
+                        raise LLMError(f"streamed completion failed after {attempt + 1} attempts: {e}") from e
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                except (httpx.HTTPError, ValueError) as e:
+                    self.stats["errors"] += 1
+                    raise LLMError(f"streamed completion failed: {e}") from e
+
+    def _ensure_runner(self):
+        with self._runner_lock:
+            if self._runner is None:
+                self._runner = BackgroundLoop()
+        return self._runner
+
+    def stream_sync(self, messages):
+        """Blocking generator over ``stream()`` for Flask streaming responses"""
+        runner = self._ensure_runner()
+        pieces = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for text in self.stream(messages):
+                    pieces.put(text)
+            except BaseException as e:
+                pieces.put(e)
+                if not isinstance(e, Exception):
+                    raise
+            else:
+                pieces.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), runner.loop)
+        # Same allowance as complete_sync, applied to every gap between pieces
+        deadline = (self.timeout + self.backoff_max) * (self.max_retries + 1)
+        try:
+            while True:
+                try:
+                    item = pieces.get(timeout=deadline)
+                except queue.Empty:
+                    raise LLMError(f"no data from upstream for {deadline:.0f}s") from None
+                if item is finished:
+                    return
+                if isinstance(item, BaseException):
+                    if isinstance(item, LLMError):
+                        raise item
+                    raise LLMError(f"streamed completion failed: {item}") from item
+                yield item
+        finally:
+            # Stops the upstream call if the browser disconnects mid-stream
+            future.cancel()
+
+    def complete_sync(self, messages):
+        """Blocking wrapper for Flask views; runs on the shared background loop"""
+        runner = self._ensure_runner()
+        # Allow for every retry plus its backoff before giving up on the future
+        deadline = (self.timeout + self.backoff_max) * (self.max_retries + 1)
+        try:
+            return runner.run(self.complete(messages), timeout=deadline)
+        except concurrent.futures.TimeoutError as e:
+            raise LLMError(f"completion did not finish within {deadline:.0f}s") from e
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self):
+        if self._runner is not None:
+            self._runner.run(self.aclose())
+            self._runner.close()
+            self._runner = None
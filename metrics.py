@@ -0,0 +1,265 @@
+"""
+Neralu Farms AI Chatbot - Metrics
+Per-stage request timers, fixed-bucket latency histograms, a Prometheus text
+/metrics endpoint and an opt-in sampling profiler for slow requests
+"""
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from flask import Blueprint, Response, g, request
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine enough for microsecond rule-engine stages and wide enough
+# for LLM calls
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histogram:
+    """Prometheus-style histogram over fixed bucket bounds.
+
+    Observing is a binary search and three additions; buckets are made
+    cumulative only when rendered.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        prefix = ",".join(f'{key}="{value}"' for key, value in labels)
+        separator = "," if prefix else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}{separator}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}{separator}le="+Inf"}} {self.count}')
+        label_block = f"{{{prefix}}}" if prefix else ""
+        lines.append(f"{name}_sum{label_block} {self.sum:.9g}")
+        lines.append(f"{name}_count{label_block} {self.count}")
+        return lines
+
+
+class StageTimer:
+    """Times the stages of one request: call ``lap(stage)`` as each ends"""
+
+    __slots__ = ("started", "last", "laps")
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.laps = []
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.laps.append((stage, now - self.last))
+        self.last = now
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class Metrics:
+    """Request and stage latency histograms plus values read at scrape time.
+
+    Timings are collected per request by a StageTimer and folded into the
+    histograms in one step when the request ends. ``gauge()`` and
+    ``counter()`` register callables that are only evaluated when /metrics
+    is scraped. With several worker processes each reports its own numbers.
+    """
+
+    def __init__(self, namespace="neralu", buckets=LATENCY_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._stages = {}
+        self._statuses = Counter()
+        self._values = []
+
+    def gauge(self, name, help_text, read):
+        """``read()`` returns a number, or a dict of label value -> number
+        (keyed by a single ``(label, value)`` pair)"""
+        self._values.append((f"{self.namespace}_{name}", help_text, "gauge", read))
+
+    def counter(self, name, help_text, read):
+        self._values.append((f"{self.namespace}_{name}_total", help_text, "counter", read))
+
+    def record(self, endpoint, status, timer):
+        total = timer.elapsed()
+        with self._lock:
+            histogram = self._requests.get(endpoint)
+            if histogram is None:
+                histogram = self._requests[endpoint] = Histogram(self.buckets)
+            histogram.observe(total)
+            self._statuses[(endpoint, status)] += 1
+            for stage, seconds in timer.laps:
+                histogram = self._stages.get((endpoint, stage))
+                if histogram is None:
+                    histogram = self._stages[(endpoint, stage)] = Histogram(self.buckets)
+                histogram.observe(seconds)
+
+    def render(self):
+        """Everything in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {ns}_request_seconds Time to handle a request, including streaming")
+            lines.append(f"# TYPE {ns}_request_seconds histogram")
+            for endpoint, histogram in sorted(self._requests.items()):
+                lines.extend(histogram.render(f"{ns}_request_seconds", [("endpoint", endpoint)]))
+            lines.append(f"# HELP {ns}_stage_seconds Time spent in each stage of a request")
+            lines.append(f"# TYPE {ns}_stage_seconds histogram")
+            for (endpoint, stage), histogram in sorted(self._stages.items()):
+                lines.extend(histogram.render(f"{ns}_stage_seconds", [("endpoint", endpoint), ("stage", stage)]))
+            lines.append(f"# HELP {ns}_requests_total Requests handled, by status code")
+            lines.append(f"# TYPE {ns}_requests_total counter")
+            for (endpoint, status), count in sorted(self._statuses.items()):
+                lines.append(f'{ns}_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        for name, help_text, kind, read in self._values:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            value = read()
+            if isinstance(value, dict):
+                for (label, label_value), number in sorted(value.items()):
+                    lines.append(f'{name}{{{label}="{label_value}"}} {number:.9g}')
+            else:
+                lines.append(f"{name} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps slow ones.
+
+    While any request is running, a daemon thread records the stack of
+    every request thread each ``interval`` seconds. When a request that
+    took at least ``threshold`` seconds ends, its samples are written to
+    ``directory`` in the folded-stack format read by flamegraph.pl and
+    speedscope; samples of faster requests are dropped.
+    """
+
+    def __init__(self, threshold, interval=0.005, directory="profiles"):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self.dumps = 0
+        self._active = {}
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls):
+        """Profiler configured by PROFILE_SLOW_REQUESTS_MS, or None when unset"""
+        threshold_ms = os.getenv('PROFILE_SLOW_REQUESTS_MS')
+        if not threshold_ms:
+            return None
+        return cls(
+            threshold=float(threshold_ms) / 1000,
+            interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+            directory=os.getenv('PROFILE_DIR', 'profiles')
+        )
+
+    def start(self):
+        self._active[threading.get_ident()] = Counter()
+        self._wake.set()
+
+    def stop(self, label, duration):
+        samples = self._active.pop(threading.get_ident(), None)
+        if samples and duration >= self.threshold:
+            self._dump(label, duration, samples)
+
+    def _dump(self, label, duration, samples):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label.strip('/').replace('/', '_') or 'root'}-{duration * 1000:.0f}ms.folded"
+        with open(os.path.join(self.directory, name), "w") as out:
+            for stack, count in samples.most_common():
+                out.write(f"{stack} {count}\n")
+        self.dumps += 1
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            if not self._active:
+                self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[_fold(frame)] += 1
+
+
+def _fold(frame):
+    """One stack as "outermost;...;innermost" function names"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def request_timer():
+    """The current request's StageTimer (a throwaway one outside requests)"""
+    return g.get("request_timer") or StageTimer()
+
+
+def create_metrics_blueprint(metrics, profiler=None):
+    """Blueprint timing every request of the app it is registered on and
+    serving ``metrics`` at /metrics"""
+    blueprint = Blueprint("metrics", __name__)
+
+    if profiler is not None:
+        metrics.counter("slow_request_profiles", "Slow requests whose stacks were dumped",
+                        lambda: profiler.dumps)
+
+    @blueprint.before_app_request
+    def start_timer():
+        if request.endpoint == "metrics.scrape":
+            return
+        g.request_timer = StageTimer()
+        if profiler is not None:
+            profiler.start()
+
+    @blueprint.after_app_request
+    def note_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @blueprint.teardown_app_request
+    def record_request(error):
+        timer = g.pop("request_timer", None)
+        if timer is None:
+            return
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        status = 500 if error is not None else g.get("response_status", 200)
+        metrics.record(endpoint, status, timer)
+        if profiler is not None:
+            profiler.stop(endpoint, timer.elapsed())
+
+    @blueprint.route('/metrics', methods=['GET'])
+    def scrape():
+        """Prometheus scrape endpoint"""
+        return Response(metrics.render(), mimetype=PROMETHEUS_MIMETYPE)
+
+    return blueprint
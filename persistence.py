@@ -0,0 +1,332 @@
+"""
+Neralu Farms AI Chatbot - Durable Session and Lead Persistence
+Pluggable storage backends fed by a background writer that batches commits,
+so /chat never waits on disk
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+from session_store import Message
+
+
+class PersistenceBackend:
+    """Storage interface used by the background writer.
+
+    Message records are ``(session_id, role, content, timestamp, intent)``
+    tuples and leads are the dicts kept by ``LeadStore``. ``write_batch`` is
+    only ever called from the writer thread and must make the whole batch
+    durable with a single commit.
+    """
+
+    def write_batch(self, messages, leads):
+        raise NotImplementedError
+
+    def load_session(self, session_id, limit=None):
+        """Return the stored messages of one session, oldest first; only the
+        latest ``limit`` of them if given"""
+        raise NotImplementedError
+
+    def load_leads(self):
+        """Return every stored lead, latest version of each"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(PersistenceBackend):
+    """SQLite database in WAL mode so readers never block the writer.
+
+    ``synchronous=FULL`` syncs the WAL on every commit, so each batch the
+    writer reports as written survives a power failure, at one fsync per
+    batch.
+    """
+
+    synchronous = "FULL"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                intent TEXT
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+            CREATE TABLE IF NOT EXISTS leads (
+                phone TEXT PRIMARY KEY,
+                name TEXT,
+                session_id TEXT NOT NULL,
+                captured_at TEXT NOT NULL,
+                project TEXT
+            );
+        """)
+        # Databases created before leads recorded a project
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(leads)")}
+        if "project" not in columns:
+            conn.execute("ALTER TABLE leads ADD COLUMN project TEXT")
+
+    def _connect(self):
+        # One connection per thread; sqlite3 connections are not shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+        return conn
+
+    def write_batch(self, messages, leads):
+        conn = self._connect()
+        with conn:
+            if messages:
+                conn.executemany(
+                    "INSERT INTO messages (session_id, role, content, timestamp, intent) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    messages
+                )
+            if leads:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO leads (phone, name, session_id, captured_at, project) "
+                    "VALUES (:phone, :name, :session_id, :captured_at, :project)",
+                    [dict(lead, project=lead.get("project")) for lead in leads]
+                )
+
+    def load_session(self, session_id, limit=None):
+        # Newest first so LIMIT keeps the latest turns; -1 means no limit
+        rows = self._connect().execute(
+            "SELECT role, content, timestamp, intent FROM messages "
+            "WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, -1 if limit is None else limit)
+        ).fetchall()
+        return [Message(*row) for row in reversed(rows)]
+
+    def load_leads(self):
+        rows = self._connect().execute(
+            "SELECT name, phone, project, session_id, captured_at FROM leads ORDER BY captured_at"
+        ).fetchall()
+        return [
+            {"name": name, "phone": phone, "project": project, "session_id": session_id,
+             "captured_at": captured_at}
+            for name, phone, project, session_id, captured_at in rows
+        ]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JSONLBackend(PersistenceBackend):
+    """Append-only JSON Lines log, one record per line.
+
+    The log is scanned once when opened to build an index of byte offsets
+    per session, so rehydrating a session only reads that session's lines.
+    A last line left incomplete by a crash mid-write is cut off so new
+    records start on a line of their own; unreadable lines elsewhere are
+    skipped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = {}
+        torn = None
+        if os.path.exists(path):
+            with open(path, "rb") as log:
+                offset = 0
+                for line in log:
+                    record = _parse(line)
+                    if record is None:
+                        torn = offset if torn is None else torn
+                    else:
+                        torn = None
+                        if record["type"] == "message":
+                            self._offsets.setdefault(record["session_id"], []).append(offset)
+                    offset += len(line)
+        if torn is not None:
+            print(f"Persistence Error: dropping incomplete record at byte {torn} of {path}")
+            os.truncate(path, torn)
+        self._file = open(path, "ab")
+
+    def write_batch(self, messages, leads):
+        lines = []
+        for session_id, role, content, timestamp, intent in messages:
+            lines.append(json.dumps({
+                "type": "message", "session_id": session_id, "role": role,
+                "content": content, "timestamp": timestamp, "intent": intent
+            }).encode() + b"\n")
+        for lead in leads:
+            lines.append(json.dumps(dict(lead, type="lead")).encode() + b"\n")
+
+        with self._lock:
+            offset = self._file.tell()
+            for line, record in zip(lines, messages):
+                self._offsets.setdefault(record[0], []).append(offset)
+                offset += len(line)
+            self._file.write(b"".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def load_session(self, session_id, limit=None):
+        with self._lock:
+            offsets = self._offsets.get(session_id, [])
+            offsets = offsets[-limit:] if limit else list(offsets)
+        if not offsets:
+            return []
+        messages = []
+        with open(self.path, "rb") as log:
+            for offset in offsets:
+                log.seek(offset)
+                record = json.loads(log.readline())
+                messages.append(Message(
+                    record["role"], record["content"], record["timestamp"], record["intent"]
+                ))
+        return messages
+
+    def load_leads(self):
+        leads = {}
+        with open(self.path, "rb") as log:
+            for line in log:
+                record = _parse(line)
+                if record is not None and record.pop("type") == "lead":
+                    leads[record["phone"]] = record
+        return sorted(leads.values(), key=lambda lead: lead["captured_at"])
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _parse(line):
+    """The record on one log line, or None if the line is incomplete or unreadable"""
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) and "type" in record else None
+
+
+class BackgroundWriter:
+    """Queues records from request threads and writes them in batches.
+
+    Records are picked up by a daemon thread, which waits up to
+    ``flush_interval`` seconds to gather up to ``batch_size`` of them and
+    then writes the batch with one commit (one fsync for the JSONL log).
+    """
+
+    def __init__(self, backend, batch_size=256, flush_interval=0.05):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+
+    def record_message(self, session_id, message):
+        self._queue.put(("message", (
+            session_id, message.role, message.content, message.timestamp, message.intent
+        )))
+
+    def record_lead(self, lead):
+        self._queue.put(("lead", dict(lead)))
+
+    def load_session(self, session_id, limit=None):
+        return self.backend.load_session(session_id, limit)
+
+    def load_leads(self):
+        return self.backend.load_leads()
+
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.backend.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            try:
+                while item is not None and len(batch) < self.batch_size:
+                    item = self._queue.get(timeout=self.flush_interval)
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            stop = batch[-1] is None
+            records = [entry for entry in batch if entry is not None]
+            messages = [record for kind, record in records if kind == "message"]
+            leads = [record for kind, record in records if kind == "lead"]
+            try:
+                if messages or leads:
+                    self.backend.write_batch(messages, leads)
+            except Exception as e:
+                print(f"Persistence Error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+
+class NullPersistence:
+    """Keeps everything in memory only; the default"""
+
+    def record_message(self, session_id, message):
+        pass
+
+    def record_lead(self, lead):
+        pass
+
+    def load_session(self, session_id, limit=None):
+        return []
+
+    def load_leads(self):
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    "sqlite": (SQLiteBackend, "neralu_chat.db"),
+    "jsonl": (JSONLBackend, "neralu_chat.jsonl"),
+}
+
+
+def open_persistence(kind="none", path=None):
+    """Open the configured backend behind a background writer.
+
+    ``kind`` is ``"none"``, ``"sqlite"`` or ``"jsonl"``; ``path`` defaults
+    to a file in the working directory.
+    """
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return NullPersistence()
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown persistence backend '{kind}', expected one of: none, {', '.join(BACKENDS)}")
+    backend_class, default_path = BACKENDS[kind]
+    return BackgroundWriter(backend_class(path or default_path))
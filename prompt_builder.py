@@ -0,0 +1,165 @@
+"""
+Neralu Farms AI Chatbot - Prompt Builder
+Fits the conversation into a token budget behind a stable system prompt,
+folding older turns into a rolling per-session summary
+"""
+
+import re
+from collections import deque
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+LONG_WORD_PATTERN = re.compile(r"\w{6,}")
+WIDE_SYMBOL_PATTERN = re.compile(r"[^\w\s\x00-\x7f]")
+
+# Characters per token for long words, and the chat format's overhead per
+# message and per request (OpenAI's published counting rules)
+CHARS_PER_TOKEN = 5
+MESSAGE_OVERHEAD = 4
+REPLY_PRIMING = 3
+
+# Words of each earlier visitor message kept in the summary, and tokens of
+# the summary set aside for its header, topics and lead line
+SUMMARY_QUOTE_WORDS = 24
+SUMMARY_OVERHEAD_TOKENS = 60
+
+
+def count_tokens(text):
+    """Approximate BPE token count without a tokenizer dependency.
+
+    Each word or punctuation mark is a token, words longer than
+    ``CHARS_PER_TOKEN`` add one per further ``CHARS_PER_TOKEN`` characters
+    and emoji or other symbols count twice. This tracks cl100k counts
+    closely on English chat and errs on the high side.
+    """
+    return (
+        len(TOKEN_PATTERN.findall(text))
+        + sum((len(word) - 1) // CHARS_PER_TOKEN for word in LONG_WORD_PATTERN.findall(text))
+        + len(WIDE_SYMBOL_PATTERN.findall(text))
+    )
+
+
+def count_message_tokens(messages):
+    """Prompt tokens for a list of chat completions messages"""
+    return REPLY_PRIMING + sum(MESSAGE_OVERHEAD + count_tokens(msg["content"]) for msg in messages)
+
+
+class ConversationSummary:
+    """Rolling summary of the turns that no longer fit in the prompt.
+
+    Turns are folded in oldest first and only once: each visitor message
+    becomes a clipped quote (repeats are skipped) and each answer adds its intent to the topics
+    already covered. Quotes that would take the summary past ``max_tokens``
+    are dropped oldest first.
+    """
+
+    __slots__ = ("max_tokens", "topics", "quotes", "quote_tokens", "last_folded")
+
+    def __init__(self, max_tokens):
+        self.max_tokens = max_tokens
+        self.topics = {}
+        self.quotes = deque()
+        self.quote_tokens = 0
+        self.last_folded = None
+
+    def fold(self, message):
+        if message.role == "user":
+            words = message.content.split()
+            quote = " ".join(words[:SUMMARY_QUOTE_WORDS]) + (" ..." if len(words) > SUMMARY_QUOTE_WORDS else "")
+            line = f"- Visitor: {quote}"
+            if quote and all(line != quoted for quoted, _ in self.quotes):
+                tokens = count_tokens(line)
+                self.quotes.append((line, tokens))
+                self.quote_tokens += tokens
+                while self.quote_tokens > self.max_tokens - SUMMARY_OVERHEAD_TOKENS and len(self.quotes) > 1:
+                    self.quote_tokens -= self.quotes.popleft()[1]
+        elif message.intent and message.intent != "general":
+            self.topics[message.intent] = None
+        self.last_folded = message
+
+    def text(self, lead=None):
+        lines = []
+        if self.topics:
+            lines.append("Topics already answered: " + ", ".join(self.topics).replace("_", " "))
+        if lead is not None and (lead.name or lead.phone):
+            known = [f"name {lead.name}"] if lead.name else []
+            known += ["phone number"] if lead.phone else []
+            lines.append("Visitor has already shared: " + " and ".join(known))
+        if self.quotes:
+            lines.append("Earlier visitor messages:")
+            lines.extend(line for line, _ in self.quotes)
+        if not lines:
+            return ""
+        return "Summary of the conversation so far:\n" + "\n".join(lines)
+
+
+class PromptBuilder:
+    """Builds chat completions messages for a session within a token budget.
+
+    The system prompt is always the first message and never changes, so
+    providers that cache prompt prefixes can reuse it across requests. After
+    it come the session's rolling summary (if any), the per-question
+    ``context`` passed to ``build()`` (if any), and then as many of the
+    latest unsummarized turns as fit in ``budget`` tokens, reserving
+    ``summary_tokens`` for the summary and ``context_tokens`` for the
+    context. Turns that fall out of that window are folded into the
+    summary, so each turn is summarized once.
+    """
+
+    def __init__(self, system_prompt, budget=1600, summary_tokens=250, context_tokens=0):
+        self.prefix = ({"role": "system", "content": system_prompt},)
+        self.prefix_tokens = count_message_tokens(self.prefix)
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.context_tokens = context_tokens
+        self.history_budget = budget - self.prefix_tokens - summary_tokens - context_tokens
+        if self.history_budget <= 0:
+            raise ValueError(f"Prompt budget {budget} leaves no room after the system prompt "
+                             f"({self.prefix_tokens} tokens), summary ({summary_tokens}) "
+                             f"and context ({context_tokens})")
+
+    def build(self, session, context=""):
+        summary = session.summary
+        if summary is None:
+            summary = session.summary = ConversationSummary(self.summary_tokens)
+        pending = _after(session.messages, summary.last_folded)
+
+        # Newest turns first until the budget is spent; the latest always goes in
+        start = len(pending)
+        spent = 0
+        while start > 0:
+            cost = _message_tokens(pending[start - 1])
+            if spent + cost > self.history_budget and start < len(pending):
+                break
+            spent += cost
+            start -= 1
+        # Don't open the window with an answer whose question was summarized
+        while start < len(pending) - 1 and pending[start].role != "user":
+            start += 1
+        for message in pending[:start]:
+            summary.fold(message)
+
+        messages = list(self.prefix)
+        summary_text = summary.text(session.lead)
+        if summary_text:
+            messages.append({"role": "system", "content": summary_text})
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.extend({"role": msg.role, "content": msg.content} for msg in pending[start:])
+        return messages
+
+
+def _message_tokens(message):
+    # Counted once per turn and cached on the message
+    if message.tokens is None:
+        message.tokens = MESSAGE_OVERHEAD + count_tokens(message.content)
+    return message.tokens
+
+
+def _after(messages, marker):
+    """Messages newer than ``marker``; all of them if it is gone or None"""
+    messages = list(messages)
+    if marker is not None:
+        for index, message in enumerate(messages):
+            if message is marker:
+                return messages[index + 1:]
+    return messages
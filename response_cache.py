@@ -0,0 +1,198 @@
+"""
+Neralu Farms AI Chatbot - LLM Response Cache
+Exact-match and similar-question tiers in front of the LLM call
+"""
+
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for matching questions to each other,
+# including filler such as "exactly" or "I want to"
+STOP_WORDS = frozenset("""
+a about an and any are as at be by can could details do does exactly explain
+for from get give have how i in info information is it just kindly know like
+me more my need of on or please some tell the there this to us want what
+whats when where which with would you your
+""".split())
+
+# Words that turn a question into its opposite. "Can't" and "don't" are
+# split into "can" + "t", so a lone "t" counts too. A negated question
+# never reuses the answer to a question that is not negated, however
+# similar the rest of the words are.
+NEGATIONS = frozenset("""
+aren cannot cant didn doesn doesnt don dont hasn haven isn isnt never no none
+nor not nothing shouldn t wasn won wont without wouldn
+""".split())
+
+# Hashed buckets for words outside the vocabulary, so unknown words still
+# make two questions less similar instead of being ignored
+OOV_BUCKETS = 256
+
+
+def is_negated(text):
+    """Whether the question contains a negation such as not or can't"""
+    return not NEGATIONS.isdisjoint(WORD_PATTERN.findall(text.lower()))
+
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+# Earlier visitor questions that make up a cached answer's context
+CONTEXT_USER_TURNS = 1
+
+
+def context_hash(history):
+    """Short hash of the visitor's question before this one, so a cached
+    answer is only reused where the conversation was on the same topic.
+    Bot replies are left out: they vary from call to call, and keying on
+    them would make every follow-up miss."""
+    digest = hashlib.sha1()
+    asked = [msg.content for msg in history if msg.role == "user"][-CONTEXT_USER_TURNS:]
+    for content in asked:
+        digest.update(normalize_question(content).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()[:12]
+
+
+class ResponseCache:
+    """Two-tier LRU cache of LLM answers with a TTL.
+
+    The exact tier is keyed on the normalized question plus the context
+    hash. The similarity tier turns each cached question into a TF-IDF
+    vector stored as a row of a preallocated matrix. A new question is
+    compared with every row holding the same context in one matrix-vector
+    product, and its answer is reused if the best cosine similarity is at
+    least ``similarity_threshold`` and both questions are negated or
+    neither is. IDF weights come from ``seed_corpus`` (e.g. the knowledge
+    base and common questions); ``reseed`` rebuilds them when that corpus
+    changes.
+    """
+
+    def __init__(self, seed_corpus, max_entries=1024, ttl=3600, similarity_threshold=0.85):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0}
+        self._lock = threading.Lock()
+        self._build(seed_corpus)
+
+    def _build(self, seed_corpus):
+        documents = [set(self._words(doc)) for doc in seed_corpus]
+        vocabulary = sorted(set().union(*documents)) if documents else []
+        self._index = {word: i for i, word in enumerate(vocabulary)}
+        self._features = len(vocabulary) + OOV_BUCKETS
+        document_frequency = np.zeros(self._features, dtype=np.float32)
+        for words in documents:
+            for word in words:
+                document_frequency[self._index[word]] += 1
+        # Smoothed IDF; out-of-vocabulary buckets get the rarest weight
+        self._idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+
+        self._entries = OrderedDict()
+        self._matrix = np.zeros((self.max_entries, self._features), dtype=np.float32)
+        self._contexts = np.zeros(self.max_entries, dtype=np.int64)
+        self._negated = np.zeros(self.max_entries, dtype=bool)
+        self._slot_keys = [None] * self.max_entries
+        self._expires = np.zeros(self.max_entries)
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    @staticmethod
+    def _words(text):
+        return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+
+    def _vector(self, question):
+        vector = np.zeros(self._features, dtype=np.float32)
+        base = self._features - OOV_BUCKETS
+        for word in self._words(question):
+            index = self._index.get(word)
+            if index is None:
+                index = base + zlib.crc32(word.encode()) % OOV_BUCKETS
+            vector[index] += 1
+        vector *= self._idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, question, history):
+        """Return a cached answer for the question, or None"""
+        context = context_hash(history)
+        key = (normalize_question(question), context)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry[1]
+
+            vector = self._vector(question)
+            if vector.any() and self._entries:
+                scores = self._matrix @ vector
+                # Empty slots have expiry 0, so this also masks them out
+                scores[(self._contexts != int(context, 16)) | (self._expires <= now)
+                       | (self._negated != is_negated(question))] = -1
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    similar_key = self._slot_keys[best]
+                    self._entries.move_to_end(similar_key)
+                    self.stats["similar_hits"] += 1
+                    return self._entries[similar_key][1]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, question, history, answer):
+        """Cache an answer for the question asked after ``history``"""
+        context = context_hash(history)
+        key = (normalize_question(question), context)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                slot = entry[0]
+            elif self._free:
+                slot = self._free.pop()
+            else:
+                _, (slot, _, _) = self._entries.popitem(last=False)
+            self._entries[key] = (slot, answer, expires)
+            self._matrix[slot] = self._vector(question)
+            self._contexts[slot] = int(context, 16)
+            self._negated[slot] = is_negated(question)
+            self._slot_keys[slot] = key
+            self._expires[slot] = expires
+
+    def reseed(self, seed_corpus):
+        """Rebuild the vocabulary and IDF weights from a new corpus, e.g. a
+        reloaded knowledge base. Cached answers are dropped with them, since
+        their vectors were weighted by the old corpus."""
+        with self._lock:
+            self._build(seed_corpus)
+
+    def clear(self):
+        """Drop every cached answer, e.g. once the knowledge base has changed"""
+        with self._lock:
+            self._entries.clear()
+            self._expires[:] = 0
+            self._slot_keys = [None] * self.max_entries
+            self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def hit_rate(self):
+        hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,62 @@
+"""
+Neralu Farms AI Chatbot - Pre-rendered Response Registry
+Renders every intent response once from the knowledge base and keeps the
+encoded bytes ready for the /chat hot path
+"""
+
+import json
+import threading
+
+from streaming import split_for_streaming
+
+
+class RenderedResponse:
+    """One rendered intent response in the forms the server hands out"""
+
+    __slots__ = ("text", "encoded", "json", "chunks")
+
+    def __init__(self, text):
+        self.text = text
+        self.encoded = text.encode("utf-8")
+        # JSON string literal, ready to splice into a response body
+        self.json = json.dumps(text).encode("utf-8")
+        # Pieces for the streaming protocol
+        self.chunks = split_for_streaming(text)
+
+
+class ResponseRegistry:
+    """Intent -> RenderedResponse lookup, rebuilt only on knowledge reload.
+
+    ``renderer`` takes the knowledge base dict and returns a dict of
+    intent -> response text. It must include the ``fallback`` intent, which
+    answers for any intent without its own entry.
+    """
+
+    def __init__(self, renderer, knowledge, fallback="general"):
+        self._renderer = renderer
+        self._fallback = fallback
+        self._lock = threading.Lock()
+        self._responses = {}
+        self.reload(knowledge)
+
+    def reload(self, knowledge):
+        """Re-render every response and swap the new set in atomically"""
+        rendered = {
+            intent: RenderedResponse(text)
+            for intent, text in self._renderer(knowledge).items()
+        }
+        if self._fallback not in rendered:
+            raise ValueError(f"renderer did not produce the '{self._fallback}' response")
+        with self._lock:
+            self._responses = rendered
+
+    def get(self, intent):
+        """Return the RenderedResponse for an intent, or the fallback"""
+        responses = self._responses
+        return responses.get(intent) or responses[self._fallback]
+
+    def text(self, intent):
+        return self.get(intent).text
+
+    def intents(self):
+        return list(self._responses)
@@ -0,0 +1,211 @@
+"""
+Neralu Farms AI Chatbot - Knowledge Retrieval
+Splits the knowledge base and brochures into short passages and ranks them
+for a question with BM25, so the LLM prompt carries only the facts it needs
+"""
+
+import glob
+import os
+import re
+
+import numpy as np
+
+from prompt_builder import MESSAGE_OVERHEAD, count_tokens
+from response_cache import STOP_WORDS, WORD_PATTERN
+
+# BM25 term saturation and length normalization (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words of the intent's own patterns added to a question, at this weight,
+# so "how much does it cost" still finds the passage about payment plans
+EXPANSION_WEIGHT = 0.5
+
+# Passages scoring below this share of the best match are left out, so a
+# narrow question does not pad the prompt with loosely related facts
+MIN_SCORE_RATIO = 0.3
+
+# Brochure passages are cut at paragraph breaks, then to at most this many words
+PASSAGE_WORDS = 120
+
+CONTEXT_HEADER = (
+    "Relevant facts from the Neralu Farms knowledge base. Answer from these; "
+    "if they do not cover the question, offer to connect the user with the team."
+)
+CONTEXT_OVERHEAD_TOKENS = MESSAGE_OVERHEAD + count_tokens(CONTEXT_HEADER + "\n")
+
+
+class Passage:
+    """One retrievable piece of knowledge"""
+
+    __slots__ = ("key", "title", "text", "tokens")
+
+    def __init__(self, key, title, text):
+        self.key = key
+        self.title = title
+        self.text = text
+        self.tokens = count_tokens(f"- {title}: {text}\n")
+
+
+def terms(text):
+    """Index terms: lowercase words without stop words, plurals folded"""
+    found = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 4 and word.endswith("oes"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        found.append(word)
+    return found
+
+
+def _title(key):
+    return key.replace("_", " ").title()
+
+
+def _flat(value):
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{_title(key)}: {_flat(item)}" for key, item in value.items())
+    return str(value)
+
+
+def chunk_knowledge(knowledge):
+    """One passage per fact of the knowledge base.
+
+    Sections of plain facts (``concept``, ``plantations``) give a passage
+    per key. Sections of records (``projects``) give one per record, plus an
+    overview naming them all for questions such as "which projects do you
+    have?".
+    """
+    passages = []
+    for section, content in knowledge.items():
+        if not isinstance(content, dict):
+            passages.append(Passage(section, _title(section), _flat(content)))
+            continue
+        records = [value for value in content.values() if isinstance(value, dict)]
+        if records and len(records) == len(content):
+            names = [record.get("name", _title(key)) for key, record in content.items()]
+            passages.append(Passage(section, _title(section), ", ".join(names)))
+            for key, record in content.items():
+                title = record.get("name", _title(key))
+                details = {name: value for name, value in record.items() if name not in ("name", "short_name", "keywords")}
+                passages.append(Passage(f"{section}.{key}", title, _flat(details)))
+        else:
+            for key, value in content.items():
+                passages.append(Passage(f"{section}.{key}", f"{_title(section)} - {_title(key)}", _flat(value)))
+    return passages
+
+
+def chunk_text(name, text, max_words=PASSAGE_WORDS):
+    """Passages of a brochure: its paragraphs, long ones split by words"""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        for start in range(0, len(words), max_words):
+            piece = " ".join(words[start:start + max_words])
+            if piece:
+                passages.append(Passage(f"{name}#{len(passages) + 1}", _title(name), piece))
+    return passages
+
+
+def load_brochures(patterns, base_dir):
+    """Passages of every text or Markdown file matching ``patterns``,
+    relative to ``base_dir``"""
+    passages = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(base_dir, pattern))):
+            with open(path, encoding="utf-8") as source:
+                name = os.path.splitext(os.path.basename(path))[0]
+                passages.extend(chunk_text(name, source.read()))
+    return passages
+
+
+class Retriever:
+    """BM25 over a fixed set of passages, held as one NumPy matrix.
+
+    The BM25 weight of every (term, passage) pair is computed once when the
+    index is built, so ranking a question is a row lookup per question term
+    and one weighted sum; nothing leaves the process. With a ``matcher``
+    and its ``intent_patterns``, the patterns of the question's intent are
+    added as weaker extra terms, which bridges the commonest wording gaps
+    without embeddings.
+    """
+
+    def __init__(self, passages, matcher=None, intent_patterns=None, k1=BM25_K1, b=BM25_B):
+        self.passages = list(passages)
+        self.matcher = matcher
+        documents = [terms(f"{passage.title} {passage.text}") for passage in self.passages]
+        vocabulary = sorted({term for document in documents for term in document})
+        self._index = {term: i for i, term in enumerate(vocabulary)}
+
+        counts = np.zeros((len(vocabulary), len(documents)), dtype=np.float32)
+        for column, document in enumerate(documents):
+            for term in document:
+                counts[self._index[term], column] += 1
+        lengths = np.array([len(document) for document in documents], dtype=np.float32)
+        average = lengths.mean() if len(documents) else 1.0
+        document_frequency = (counts > 0).sum(axis=1)
+        idf = np.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1 - b + b * lengths / max(average, 1.0))
+        # term x passage, so a question's terms select contiguous rows
+        self._weights = (idf[:, None] * counts * (k1 + 1) / (counts + norm)).astype(np.float32)
+
+        self._expansions = {
+            intent: terms(" ".join(patterns)) for intent, patterns in (intent_patterns or {}).items()
+        }
+
+    def _query(self, question):
+        weights = {}
+        for term in terms(question):
+            weights[term] = 1.0
+        if self.matcher is not None:
+            for term in self._expansions.get(self.matcher.match(question), ()):
+                weights.setdefault(term, EXPANSION_WEIGHT)
+        rows = [self._index[term] for term in weights if term in self._index]
+        return rows, np.array([weights[term] for term in weights if term in self._index], dtype=np.float32)
+
+    def scores(self, question):
+        rows, weights = self._query(question)
+        if not rows:
+            return np.zeros(len(self.passages), dtype=np.float32)
+        return weights @ self._weights[rows]
+
+    def search(self, question, k=4, max_tokens=None):
+        """Up to ``k`` passages that share terms with the question, best
+        first, within ``max_tokens`` of context"""
+        scores = self.scores(question)
+        if not scores.any():
+            return []
+        count = min(k, len(scores))
+        best = np.argpartition(-scores, count - 1)[:count]
+        cutoff = scores[best].max() * MIN_SCORE_RATIO
+        found, spent = [], 0
+        for i in best[np.argsort(-scores[best], kind="stable")]:
+            if scores[i] <= 0 or scores[i] < cutoff:
+                break
+            passage = self.passages[i]
+            if max_tokens is not None and spent + passage.tokens > max_tokens:
+                continue
+            found.append(passage)
+            spent += passage.tokens
+        return found
+
+    def context(self, question, k=4, max_tokens=None):
+        """``context_text`` of the best passages, the whole message within
+        ``max_tokens``"""
+        if max_tokens is not None:
+            max_tokens -= CONTEXT_OVERHEAD_TOKENS
+        return context_text(self.search(question, k, max_tokens))
+
+
+def context_text(passages):
+    """The system message carrying retrieved passages; empty without any"""
+    if not passages:
+        return ""
+    return CONTEXT_HEADER + "\n" + "".join(f"- {passage.title}: {passage.text}\n" for passage in passages)
@@ -0,0 +1,92 @@
+"""
+Neralu Farms AI Chatbot - Hybrid Router
+Answers from the rule engine when the intent is clear and sends only the
+rest to the LLM, recording every routing decision and its latency
+"""
+
+import threading
+import time
+from collections import deque
+
+ROUTE_RULES = "rules"
+ROUTE_CACHE = "cache"
+ROUTE_LLM = "llm"
+
+
+class RouteDecision:
+    """Where one message goes and why"""
+
+    __slots__ = ("route", "intent", "confidence")
+
+    def __init__(self, route, intent, confidence):
+        self.route = route
+        self.intent = intent
+        self.confidence = confidence
+
+
+class HybridRouter:
+    """Chooses between the rule engine and the LLM for each message.
+
+    A message goes to the rules when the matcher finds a specific intent
+    with confidence of at least ``min_confidence``; ``general`` and
+    ambiguous messages go to the LLM. Completed requests are recorded with
+    ``record()``; the latest ``log_size`` of them are kept for percentiles.
+    """
+
+    def __init__(self, matcher, min_confidence=0.5, log_size=10000):
+        self.matcher = matcher
+        self.min_confidence = min_confidence
+        self.counts = {ROUTE_RULES: 0, ROUTE_CACHE: 0, ROUTE_LLM: 0}
+        self._log = deque(maxlen=log_size)
+        self._lock = threading.Lock()
+
+    def route(self, message, matcher=None):
+        """Decide with ``matcher``, e.g. the request's knowledge version, or
+        the router's own"""
+        matcher = matcher or self.matcher
+        intent, confidence = matcher.classify(message)
+        if intent != matcher.default and confidence >= self.min_confidence:
+            return RouteDecision(ROUTE_RULES, intent, confidence)
+        return RouteDecision(ROUTE_LLM, intent, confidence)
+
+    def record(self, session_id, route, intent, confidence, latency):
+        """Log one answered request; ``latency`` is in seconds"""
+        with self._lock:
+            self.counts[route] += 1
+            self._log.append((time.time(), session_id, route, intent, round(confidence, 3), latency))
+
+    def recent(self, limit=50):
+        with self._lock:
+            entries = list(self._log)[-limit:]
+        return [
+            {"at": at, "session_id": session_id, "route": route, "intent": intent,
+             "confidence": confidence, "latency_ms": round(latency * 1000, 2)}
+            for at, session_id, route, intent, confidence, latency in entries
+        ]
+
+    def summary(self):
+        """Counts per route, share of LLM calls avoided and latency percentiles"""
+        with self._lock:
+            counts = dict(self.counts)
+            entries = list(self._log)
+        total = sum(counts.values())
+        latencies = {}
+        for route in counts:
+            values = sorted(entry[5] for entry in entries if entry[2] == route)
+            if values:
+                latencies[route] = {
+                    "p50_ms": round(percentile(values, 50) * 1000, 2),
+                    "p99_ms": round(percentile(values, 99) * 1000, 2)
+                }
+        return {
+            "requests": total,
+            "routes": counts,
+            "llm_calls_avoided": round(1 - counts[ROUTE_LLM] / total, 4) if total else 0.0,
+            "latency": latencies
+        }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
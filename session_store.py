@@ -0,0 +1,150 @@
+"""
+Neralu Farms AI Chatbot - Bounded Session Store
+Conversation history with LRU/TTL eviction and compact message records
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from lead_capture import LeadExtractor
+
+
+class Message:
+    """One conversation turn; epoch-float timestamp instead of an ISO string.
+    ``tokens`` caches the prompt builder's token count for the turn."""
+
+    __slots__ = ("role", "content", "timestamp", "intent", "tokens")
+
+    def __init__(self, role, content, timestamp=None, intent=None):
+        self.role = role
+        self.content = content
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.intent = intent
+        self.tokens = None
+
+    def __getitem__(self, key):
+        # Lets older code keep reading msg["role"] / msg["content"]
+        return getattr(self, key)
+
+    def to_dict(self):
+        data = {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+        if self.intent is not None:
+            data["intent"] = self.intent
+        return data
+
+
+class Session:
+    """One visitor's conversation: capped history, lead extraction state and
+    the rolling summary kept by the prompt builder"""
+
+    __slots__ = ("session_id", "messages", "lead", "summary", "last_seen")
+
+    def __init__(self, session_id, max_history, messages=()):
+        self.session_id = session_id
+        self.messages = deque(messages, maxlen=max_history)
+        self.lead = LeadExtractor()
+        for message in self.messages:
+            if message.role == "user":
+                self.lead.feed(message.content)
+        self.summary = None
+        self.last_seen = time.monotonic()
+
+    def append(self, role, content, intent=None):
+        message = Message(role, content, intent=intent)
+        self.messages.append(message)
+        return message
+
+    def history(self):
+        return [message.to_dict() for message in self.messages]
+
+
+class SessionStore:
+    """Sessions keyed by id, evicted least-recently-used first.
+
+    At most ``max_sessions`` sessions are kept, and sessions idle for more
+    than ``ttl`` seconds are dropped. Each session keeps only its latest
+    ``max_history`` messages. Every access moves a session to the back of
+    the LRU order, so the front is always the longest idle one and expired
+    sessions can be swept from the front without scanning the rest.
+
+    ``loader``, if given, is called with a session id and ``max_history``
+    the first time that id is seen by this store and returns its latest
+    stored messages, so sessions evicted here or stored before this process
+    started are rehydrated lazily. The JSONL backend indexes its log only
+    when opened and does not see another process's later writes; workers
+    that serve the same visitors share state through ``SharedSessionStore``.
+    """
+
+    session_class = Session
+
+    def __init__(self, max_sessions=10000, ttl=1800, max_history=50, loader=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_history = max_history
+        self.loader = loader
+        self.evictions = {"lru": 0, "ttl": 0}
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def get_or_create(self, session_id):
+        """Return the session for an id, creating it if needed, and mark it used"""
+        session = self._sessions.get(session_id)
+        if session is None and self.loader is not None:
+            # Load outside the lock so a slow read only delays this request
+            restored = self.session_class(session_id, self.max_history, self.loader(session_id, self.max_history))
+        else:
+            restored = None
+
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = restored or self.session_class(session_id, self.max_history)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions["lru"] += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            return session
+
+    def get(self, session_id):
+        """Return a session without refreshing it, or None"""
+        return self._sessions.get(session_id)
+
+    def expire(self):
+        """Drop every session idle for longer than the TTL"""
+        with self._lock:
+            self._expire(time.monotonic())
+
+    def _expire(self, now):
+        if not self.ttl:
+            return
+        cutoff = now - self.ttl
+        sessions = self._sessions
+        while sessions:
+            oldest = next(iter(sessions.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            sessions.popitem(last=False)
+            self.evictions["ttl"] += 1
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "evictions": dict(self.evictions)
+        }
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
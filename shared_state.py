@@ -0,0 +1,336 @@
+"""
+Neralu Farms AI Chatbot - Shared State
+Sessions and leads kept in one SQLite file, so several worker processes
+serve the same conversations and lead list consistently
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from lead_store import LeadStore, normalize_phone
+from persistence import SQLiteBackend, open_persistence
+from session_store import Message, Session, SessionStore
+
+LEAD_COLUMNS = ("name", "phone", "project", "session_id", "captured_at")
+
+
+class SharedSQLiteBackend(SQLiteBackend):
+    """SQLite backend with writes applied immediately instead of batched, and
+    a leads table keyed on the normalized phone with an id for paging.
+
+    Writes happen on the request path, one commit per message, so the WAL
+    is not synced on each: a power failure can lose the most recent
+    messages, never corrupt the file.
+    """
+
+    synchronous = "NORMAL"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS shared_leads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                phone_key TEXT NOT NULL UNIQUE,
+                name TEXT,
+                phone TEXT NOT NULL,
+                project TEXT,
+                session_id TEXT NOT NULL,
+                captured_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS shared_leads_session ON shared_leads (session_id);
+        """)
+
+    def session_revision(self, session_id):
+        """Id of the session's latest message, 0 if it has none"""
+        row = self._connect().execute(
+            "SELECT MAX(id) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def messages_after(self, session_id, after_id, before_id=None, limit=None):
+        """The latest ``limit`` (id, message) pairs of a session with ids
+        above ``after_id`` and, if given, below ``before_id``; oldest first"""
+        query = "SELECT id, role, content, timestamp, intent FROM messages WHERE session_id = ? AND id > ?"
+        params = [session_id, after_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        rows = self._connect().execute(
+            query + " ORDER BY id DESC LIMIT ?", params + [-1 if limit is None else limit]
+        ).fetchall()
+        return [(row[0], Message(*row[1:])) for row in reversed(rows)]
+
+    def append_message(self, session_id, message):
+        """Store one message; returns (revision before, revision after)"""
+        conn = self._connect()
+        # One write transaction, so no other worker's message lands between
+        # reading the revision and inserting
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.session_revision(session_id)
+            cursor = conn.execute(
+                "INSERT INTO messages (session_id, role, content, timestamp, intent) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, message.role, message.content, message.timestamp, message.intent)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return before, cursor.lastrowid
+
+    def upsert_lead(self, session_id, name, phone, project):
+        """Same merge rules as LeadStore.upsert, in one write transaction"""
+        key = normalize_phone(phone)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = (
+                conn.execute("SELECT id, name, project FROM shared_leads WHERE phone_key = ?", (key,)).fetchone()
+                or conn.execute(
+                    "SELECT id, name, project FROM shared_leads WHERE session_id = ? ORDER BY id LIMIT 1",
+                    (session_id,)
+                ).fetchone()
+            )
+            if row is None:
+                conn.execute(
+                    "INSERT INTO shared_leads (phone_key, name, phone, project, session_id, captured_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, name, phone, project, session_id, datetime.now().isoformat())
+                )
+                lead_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                changed = True
+            else:
+                lead_id, stored_name, stored_project = row
+                changed = bool((name and not stored_name) or (project and not stored_project))
+                if changed:
+                    conn.execute(
+                        "UPDATE shared_leads SET name = COALESCE(name, ?), project = COALESCE(project, ?) "
+                        "WHERE id = ?",
+                        (name or None, project or None, lead_id)
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.lead(lead_id), changed
+
+    def lead(self, lead_id):
+        row = self._connect().execute(
+            f"SELECT {', '.join(LEAD_COLUMNS)} FROM shared_leads WHERE id = ?", (lead_id,)
+        ).fetchone()
+        return dict(zip(LEAD_COLUMNS, row)) if row else None
+
+    def leads_after(self, lead_id, limit):
+        """Up to ``limit`` (id, lead) pairs with ids above ``lead_id``"""
+        rows = self._connect().execute(
+            f"SELECT id, {', '.join(LEAD_COLUMNS)} FROM shared_leads WHERE id > ? ORDER BY id LIMIT ?",
+            (lead_id, limit)
+        ).fetchall()
+        return [(row[0], dict(zip(LEAD_COLUMNS, row[1:]))) for row in rows]
+
+    def lead_id_where(self, column, value):
+        row = self._connect().execute(
+            f"SELECT id FROM shared_leads WHERE {column} = ? ORDER BY id LIMIT 1", (value,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count_leads(self, where="1", params=()):
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM shared_leads WHERE {where}", params
+        ).fetchone()[0]
+
+
+class SharedSession(Session):
+    """Session that remembers the id of the latest stored message it holds"""
+
+    __slots__ = ("revision",)
+
+    def __init__(self, session_id, max_history, messages=()):
+        super().__init__(session_id, max_history, messages)
+        self.revision = 0
+
+
+class SharedSessionStore(SessionStore):
+    """SessionStore whose sessions are a per-process cache of the shared file.
+
+    Every access fetches the session's stored messages newer than the
+    cached revision, one indexed range read that is empty unless another
+    worker has added to the conversation since, and appends them. A new
+    cache entry starts at revision 0 and so reads the latest
+    ``max_history`` messages. Cached sessions are never rebuilt, so the
+    rolling summary and its watermark carry over.
+
+    Reading new messages and recording one are serialized within the
+    process, so a message this process has stored is always reflected in
+    the cached revision before another thread looks past it.
+    """
+
+    session_class = SharedSession
+
+    def __init__(self, backend, max_sessions=10000, ttl=1800, max_history=50):
+        super().__init__(max_sessions, ttl, max_history)
+        self.backend = backend
+        self._sync = threading.Lock()
+
+    def get_or_create(self, session_id):
+        session = super().get_or_create(session_id)
+        with self._sync:
+            rows = self.backend.messages_after(session_id, session.revision, limit=self.max_history)
+            if rows:
+                with self._lock:
+                    self._apply(session, rows)
+        return session
+
+    def record(self, session_id, message):
+        with self._sync:
+            before, after = self.backend.append_message(session_id, message)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            # A gap means another worker wrote too: slot its messages in ahead of ours
+            missed = []
+            if before != session.revision:
+                missed = self.backend.messages_after(session_id, session.revision, after, self.max_history)
+            with self._lock:
+                if missed and session.messages and session.messages[-1] is message:
+                    session.messages.pop()
+                    self._apply(session, missed)
+                    session.messages.append(message)
+                elif missed:
+                    self._apply(session, missed)
+                session.revision = max(session.revision, after)
+
+    @staticmethod
+    def _apply(session, rows):
+        # Re-checked under the lock: a concurrent request may have applied them
+        for message_id, message in rows:
+            if message_id > session.revision:
+                session.messages.append(message)
+                if message.role == "user":
+                    session.lead.feed(message.content)
+                session.revision = message_id
+
+
+class SharedLeadStore(LeadStore):
+    """LeadStore interface over the shared leads table.
+
+    Cursors are lead ids rather than list positions; both only grow, so
+    they page the same way.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def upsert(self, session_id, name, phone, project=None):
+        return self.backend.upsert_lead(session_id, name, phone, project)
+
+    def restore(self, stored_leads):
+        """Nothing to do: the leads already live in the shared file"""
+
+    def page(self, cursor=0, limit=100, match=None):
+        found = []
+        while len(found) < limit:
+            rows = self.backend.leads_after(cursor, limit)
+            if not rows:
+                return found, None
+            for lead_id, lead in rows:
+                cursor = lead_id
+                if match is None or match(lead):
+                    found.append(lead)
+                    if len(found) == limit:
+                        break
+        return found, (cursor if self.backend.leads_after(cursor, 1) else None)
+
+    def get_by_phone(self, phone):
+        lead_id = self.backend.lead_id_where("phone_key", normalize_phone(phone))
+        return self.backend.lead(lead_id) if lead_id else None
+
+    def get_by_session(self, session_id):
+        lead_id = self.backend.lead_id_where("session_id", session_id)
+        return self.backend.lead(lead_id) if lead_id else None
+
+    def count(self, match=None):
+        """Counted by SQLite when ``match`` offers ``sql()`` (as
+        ``LeadFilter`` does); otherwise one page at a time"""
+        if match is None:
+            return self.backend.count_leads()
+        if hasattr(match, "sql"):
+            return self.backend.count_leads(*match.sql())
+        total, cursor = 0, 0
+        while True:
+            rows = self.backend.leads_after(cursor, 1000)
+            if not rows:
+                return total
+            total += sum(1 for _, lead in rows if match(lead))
+            cursor = rows[-1][0]
+
+    def all(self):
+        leads, cursor = [], 0
+        while cursor is not None:
+            page, cursor = self.page(cursor, 1000)
+            leads.extend(page)
+        return leads
+
+    def __len__(self):
+        return self.backend.count_leads()
+
+
+class SharedState:
+    """Shared session store and lead store, plus the persistence interface
+    the chat servers record messages through"""
+
+    def __init__(self, path, max_sessions=10000, ttl=1800, max_history=50):
+        self.backend = SharedSQLiteBackend(path)
+        self.sessions = SharedSessionStore(self.backend, max_sessions, ttl, max_history)
+        self.leads = SharedLeadStore(self.backend)
+
+    def record_message(self, session_id, message):
+        self.sessions.record(session_id, message)
+
+    def record_lead(self, lead):
+        """Nothing to do: upsert already wrote the lead"""
+
+    def load_session(self, session_id, limit=None):
+        return self.backend.load_session(session_id, limit)
+
+    def load_leads(self):
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.backend.close()
+
+
+def open_state():
+    """Session store, lead store and persistence as configured by the environment.
+
+    With SHARED_STATE_PATH set, all three live in that SQLite file and any
+    number of worker processes can serve the same visitors. Otherwise
+    sessions and leads are kept in this process's memory and optionally
+    persisted with PERSISTENCE_BACKEND / PERSISTENCE_PATH.
+
+    Returns ``(conversations, leads, persistence)``.
+    """
+    session_options = dict(
+        max_sessions=int(os.getenv('SESSION_MAX_COUNT', '10000')),
+        ttl=float(os.getenv('SESSION_TTL_SECONDS', '1800')),
+        max_history=int(os.getenv('SESSION_MAX_HISTORY', '50'))
+    )
+    shared_path = os.getenv('SHARED_STATE_PATH')
+    if shared_path:
+        state = SharedState(shared_path, **session_options)
+        atexit.register(state.close)
+        return state.sessions, state.leads, state
+
+    # Durable storage for sessions and leads (PERSISTENCE_BACKEND=none|sqlite|jsonl)
+    persistence = open_persistence(os.getenv('PERSISTENCE_BACKEND', 'none'), os.getenv('PERSISTENCE_PATH'))
+    atexit.register(persistence.close)
+    conversations = SessionStore(loader=persistence.load_session, **session_options)
+    leads = LeadStore()
+    leads.restore(persistence.load_leads())
+    return conversations, leads, persistence
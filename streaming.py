@@ -0,0 +1,60 @@
+"""
+Neralu Farms AI Chatbot - Streaming Protocol
+Chunked NDJSON responses shared by the rule-based and LLM chat servers
+
+Each line of the response body is one JSON object:
+    {"type": "token", "text": "..."}    a piece of the reply, in order
+    {"type": "done", ...}               end of reply plus the usual /chat fields
+    {"type": "error", "message": "..."} the reply could not be completed
+"""
+
+import json
+import re
+
+from flask import Response, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Words per token line when streaming text that is already complete
+STREAM_CHUNK_WORDS = 4
+
+WORD_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def split_for_streaming(text, words=STREAM_CHUNK_WORDS):
+    """Split finished text into word-group chunks that join back exactly"""
+    pieces = WORD_PATTERN.findall(text)
+    return tuple("".join(pieces[i:i + words]) for i in range(0, len(pieces), words))
+
+
+def _line(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def ndjson_stream(chunks, on_complete):
+    """Yield NDJSON lines for each chunk, then a final "done" line.
+
+    ``on_complete`` is called with the full reply text once every chunk has
+    been sent and returns the extra fields for the "done" line.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            if chunk:
+                parts.append(chunk)
+                yield _line({"type": "token", "text": chunk})
+        done = {"type": "done"}
+        done.update(on_complete("".join(parts)))
+        yield _line(done)
+    except Exception as e:
+        print(f"Streaming Error: {e}")
+        yield _line({"type": "error", "message": "The response was interrupted. Please try again."})
+
+
+def streaming_response(chunks, on_complete):
+    """Flask response that streams ``chunks`` as NDJSON without buffering"""
+    return Response(
+        stream_with_context(ndjson_stream(chunks, on_complete)),
+        mimetype=NDJSON_MIMETYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
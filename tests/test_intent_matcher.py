@@ -0,0 +1,62 @@
+"""
+Tests for the precompiled intent matcher: whole-word phrase matching, and
+the same result from the ASCII and the Unicode scan of a message
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from intent_matcher import IntentMatcher  # noqa: E402
+
+PATTERNS = {
+    "greeting": ["hi", "hello", "namaste"],
+    "site_visit": ["site visit", "visit", "schedule a tour"],
+    "booking": ["book", "i want to buy"],
+    "pricing": ["price", "how much"],
+    "about": ["tell me about", "about"],
+}
+
+
+@pytest.fixture
+def matcher():
+    return IntentMatcher(PATTERNS)
+
+
+@pytest.mark.parametrize("message, scores", [
+    ("Hello", {"greeting": 5}),
+    ("This is great", {}),
+    ("Hi, what's the PRICE?", {"greeting": 2, "pricing": 5}),
+    ("I'd like to schedule a tour", {"site_visit": 15}),
+    ("Site, visit!", {"site_visit": 10}),
+    ("Book a site visit, then visit again", {"booking": 4, "site_visit": 15}),
+    ("I am booking", {"booking": 4}),
+    ("Tell me about it", {"about": 13}),
+    ("I want to buy, how much", {"booking": 13, "pricing": 8}),
+])
+def test_scores(matcher, message, scores):
+    assert matcher.scores(message) == scores
+
+
+@pytest.mark.parametrize("message", [
+    "Hello", "This is great", "Hi, what's the PRICE?", "Site,  visit!", "Book a site visit, then visit again",
+    "tell\tme about\nthe price", "visit_time hi_there o'visit",
+])
+def test_unicode_messages_match_like_ascii_ones(matcher, message):
+    # A non-ASCII character sends the message down the Unicode scan
+    assert matcher.scores(message + " 🌿") == matcher.scores(message)
+    assert matcher.classify("¿" + message) == matcher.classify(message)
+
+
+def test_match_and_classify(matcher):
+    assert matcher.match("Hi, I want to buy a plot") == "booking"
+    assert matcher.match("Thanks") == "general"
+    assert matcher.classify("Thanks") == ("general", 0.0)
+    assert matcher.classify("How much for a site visit?") == ("site_visit", 0.2)
+    # Equal scores go to the intent listed first
+    assert IntentMatcher(PATTERNS, priority=["pricing"]).match("price visit") == "pricing"
+    assert IntentMatcher(PATTERNS).match("price visit") == "site_visit"
@@ -0,0 +1,115 @@
+"""
+Tests for hot reloading of the knowledge file: a version that fails to
+compile or that a listener rejects must leave the old one in service
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("KNOWLEDGE_RELOAD_SECONDS", "0")
+
+from knowledge import KnowledgeBase, load_knowledge_file  # noqa: E402
+from prompt_builder import PromptBuilder  # noqa: E402
+
+
+@pytest.fixture
+def knowledge_path(tmp_path):
+    path = tmp_path / "knowledge.json"
+    shutil.copy(os.path.join(ROOT, "knowledge.json"), path)
+    return str(path)
+
+
+def write(path, data):
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as out:
+        json.dump(data, out, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+def edited(path, **changes):
+    data = load_knowledge_file(path)
+    data.update(changes)
+    return data
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class PromptHolder:
+    """Listener state like advanced_chatbot.use_knowledge's prompt builder"""
+
+    def __init__(self):
+        self.builder = None
+        self.version = None
+
+    def __call__(self, compiled):
+        self.builder = PromptBuilder(compiled.persona_prompt, 1600, 250, 350)
+        self.version = compiled.version
+
+
+def test_reload_swaps_in_an_edited_file(knowledge_path):
+    knowledge = KnowledgeBase(knowledge_path)
+    holder = PromptHolder()
+    knowledge.on_swap(holder)
+    write(knowledge_path, edited(knowledge_path, persona_prompt="You are the Neralu Farms assistant."))
+    assert knowledge.reload()
+    assert knowledge.current.version == 2
+    assert holder.version == 2
+    assert knowledge.reload_errors == 0
+
+
+def test_file_that_fails_to_parse_keeps_the_old_version(knowledge_path):
+    knowledge = KnowledgeBase(knowledge_path)
+    with open(knowledge_path, "w", encoding="utf-8") as out:
+        out.write("{not json")
+    assert not knowledge.reload()
+    assert knowledge.current.version == 1
+    assert knowledge.reload_errors == 1
+
+
+def test_listener_rejecting_a_version_rolls_back(knowledge_path):
+    knowledge = KnowledgeBase(knowledge_path)
+    seen = []
+    knowledge.on_swap(lambda compiled: seen.append(compiled.version))
+    holder = PromptHolder()
+    knowledge.on_swap(holder)
+    old_builder = holder.builder
+
+    # Far more than the prompt budget, so PromptBuilder raises ValueError
+    write(knowledge_path, edited(knowledge_path, persona_prompt="word " * 1200))
+    assert not knowledge.reload()
+    assert knowledge.current.version == 1
+    assert knowledge.reload_errors == 1
+    assert knowledge.last_error.startswith("ValueError")
+    assert holder.builder is old_builder
+    # The listener that accepted version 2 was given version 1 back
+    assert seen == [1, 2, 1]
+
+
+def test_watcher_survives_a_rejected_version(knowledge_path):
+    knowledge = KnowledgeBase(knowledge_path)
+    holder = PromptHolder()
+    knowledge.on_swap(holder)
+    knowledge.watch(0.01)
+
+    write(knowledge_path, edited(knowledge_path, persona_prompt="word " * 1200))
+    assert wait_for(lambda: knowledge.reload_errors == 1)
+    assert knowledge._thread.is_alive()
+
+    write(knowledge_path, edited(knowledge_path, persona_prompt="You are the Neralu Farms assistant."))
+    assert wait_for(lambda: holder.version is not None and holder.version > 1)
+    assert knowledge.current.version == holder.version
+    assert knowledge._thread.is_alive()
@@ -0,0 +1,123 @@
+"""
+Tests for /leads and /leads/export: filters, cursor paging and CSV cells,
+against both the in-memory and the shared lead store
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lead_store import LeadStore  # noqa: E402
+from leads_api import create_leads_blueprint, csv_safe  # noqa: E402
+from persistence import NullPersistence  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from shared_state import SharedState  # noqa: E402
+
+LEADS = 25
+
+
+@pytest.fixture(params=["memory", "shared"])
+def leads(request, tmp_path):
+    if request.param == "memory":
+        yield LeadStore()
+        return
+    state = SharedState(str(tmp_path / "state.db"))
+    yield state.leads
+    state.close()
+
+
+@pytest.fixture
+def client(leads):
+    for number in range(LEADS):
+        leads.upsert(
+            f"s{number}",
+            "Asha" if number % 3 else None,
+            f"98450{number:05d}",
+            "korlaparti" if number % 2 else "sandal_valley"
+        )
+    app = Flask(__name__)
+    app.register_blueprint(create_leads_blueprint(leads, SessionStore(), NullPersistence()))
+    return app.test_client()
+
+
+def all_pages(client, query, limit):
+    phones, cursor, pages = [], None, 0
+    while True:
+        url = f"/leads?limit={limit}&conversations=false{query}"
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        body = response.get_json()
+        phones += [lead["phone"] for lead in body["leads"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return phones, body["total"], pages
+
+
+def test_cursor_paging_visits_every_lead_once_in_order(client):
+    phones, total, pages = all_pages(client, "", 7)
+    assert phones == [f"98450{number:05d}" for number in range(LEADS)]
+    assert total == LEADS
+    assert pages == 4
+
+
+def test_filtered_paging_and_total(client):
+    phones, total, _ = all_pages(client, "&project=korlaparti&has_name=true", 4)
+    expected = [f"98450{n:05d}" for n in range(LEADS) if n % 2 and n % 3]
+    assert phones == expected
+    assert total == len(expected)
+
+
+def test_since_and_until(client):
+    assert all_pages(client, "&since=2000-01-01", 100)[1] == LEADS
+    assert all_pages(client, "&until=2000-01-01", 100)[1] == 0
+    assert all_pages(client, "&since=2000-01-01T00:00%2B05:30&until=2999-01-01", 100)[1] == LEADS
+
+
+@pytest.mark.parametrize("query", [
+    "since=yesterday", "until=2026-13-01", "since=2026-10-01T25:00",
+    "has_name=maybe", "cursor=-1", "limit=0", "limit=abc",
+])
+def test_bad_parameters_are_400s(client, query):
+    response = client.get(f"/leads?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_bad_export_parameters_are_400s(client):
+    assert client.get("/leads/export?format=xml").status_code == 400
+    assert client.get("/leads/export?since=soon").status_code == 400
+
+
+def test_exports_match_the_filters(client):
+    lines = client.get("/leads/export?project=sandal_valley").get_data(as_text=True).splitlines()
+    assert len(lines) == len([n for n in range(LEADS) if n % 2 == 0])
+    assert all(json.loads(line)["project"] == "sandal_valley" for line in lines)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/leads/export?format=csv").get_data(as_text=True))))
+    assert [row["phone"] for row in rows] == [f"98450{number:05d}" for number in range(LEADS)]
+
+
+@pytest.mark.parametrize("value", ["=HYPERLINK(\"http://x\")", "+91 98450 12345", "-2+3", "@SUM(A1)",
+                                   "\tname", "\rname"])
+def test_csv_cells_that_start_a_formula_are_escaped(value):
+    row = csv_safe({"name": value, "phone": "9845012345", "project": None,
+                    "session_id": "s1", "captured_at": "2026-10-01T09:30:00"})
+    assert row["name"] == "'" + value
+    assert row["phone"] == "9845012345"
+    assert row["project"] is None
+
+
+def test_csv_export_escapes_visitor_text(leads, client):
+    leads.upsert("evil", "=cmd|' /C calc'!A0", "+91 9000000001")
+    rows = list(csv.DictReader(io.StringIO(client.get("/leads/export?format=csv").get_data(as_text=True))))
+    assert rows[-1]["name"] == "'=cmd|' /C calc'!A0"
+    assert rows[-1]["phone"] == "'+91 9000000001"
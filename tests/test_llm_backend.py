@@ -0,0 +1,80 @@
+"""
+Tests for the async LLM backend's timeout, retry and error handling,
+run against the local stub LLM in benchmarks/stub_llm.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from llm_backend import AsyncLLMBackend, LLMError  # noqa: E402
+from stub_llm import start_stub_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "What is managed farmland?"}]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**config):
+        server, url = start_stub_server(**config)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def backends():
+    opened = []
+
+    def open_backend(**options):
+        backend = AsyncLLMBackend(**options)
+        opened.append(backend)
+        return backend
+
+    yield open_backend
+    for backend in opened:
+        backend.close()
+
+
+def test_completion_returns_stub_reply_and_records_usage(stub, backends):
+    _, url = stub(latency=0.01)
+    backend = backends(base_url=url, timeout=2)
+    assert "Neralu" in backend.complete_sync(MESSAGES)
+    assert backend.usage["completion_tokens"] > 0
+
+
+def test_retries_recover_from_upstream_failures(stub, backends):
+    _, url = stub(latency=0.01, error_rate=0.5, seed=7)
+    backend = backends(base_url=url, timeout=2, max_retries=6, backoff_base=0.001)
+    replies = [backend.complete_sync(MESSAGES) for _ in range(20)]
+    assert len(replies) == 20
+    assert backend.stats["retries"] > 0
+
+
+def test_non_retryable_status_fails_without_retrying(stub, backends):
+    _, url = stub(latency=0.01, error_rate=1.0, error_status=400)
+    backend = backends(base_url=url, timeout=2, max_retries=3)
+    with pytest.raises(LLMError):
+        backend.complete_sync(MESSAGES)
+    assert backend.stats["retries"] == 0
+
+
+def test_slow_upstream_times_out_per_attempt(stub, backends):
+    _, url = stub(latency=1.0)
+    backend = backends(base_url=url, timeout=0.1, max_retries=1, backoff_base=0.01)
+    start = time.perf_counter()
+    with pytest.raises(LLMError):
+        backend.complete_sync(MESSAGES)
+    assert time.perf_counter() - start < 0.6
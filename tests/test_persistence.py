@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite and JSONL persistence backends: rehydrating sessions
+and leads, and recovering a JSONL log left with a torn last line
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from persistence import JSONLBackend, SQLiteBackend, open_persistence  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+LEAD = {"name": "Asha", "phone": "9845012345", "project": "korlaparti",
+        "session_id": "s1", "captured_at": "2026-10-01T09:30:00"}
+
+
+def message(session_id, number):
+    return (session_id, "user" if number % 2 == 0 else "assistant", f"turn {number}", 1000.0 + number, None)
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def kind(request):
+    return request.param
+
+
+@pytest.fixture
+def path(tmp_path, kind):
+    return str(tmp_path / f"store.{'db' if kind == 'sqlite' else 'jsonl'}")
+
+
+def open_backend(kind, path):
+    return SQLiteBackend(path) if kind == "sqlite" else JSONLBackend(path)
+
+
+def test_sessions_and_leads_survive_a_restart(kind, path):
+    backend = open_backend(kind, path)
+    backend.write_batch([message("s1", n) for n in range(5)] + [message("s2", 0)], [LEAD])
+    backend.close()
+
+    backend = open_backend(kind, path)
+    assert [msg.content for msg in backend.load_session("s1")] == [f"turn {n}" for n in range(5)]
+    assert [msg.content for msg in backend.load_session("s2")] == ["turn 0"]
+    assert backend.load_session("missing") == []
+    assert backend.load_leads() == [LEAD]
+    backend.close()
+
+
+def test_load_session_limit_keeps_the_latest_messages(kind, path):
+    backend = open_backend(kind, path)
+    backend.write_batch([message("s1", n) for n in range(10)], [])
+    assert [msg.content for msg in backend.load_session("s1", 3)] == ["turn 7", "turn 8", "turn 9"]
+    backend.close()
+
+
+def test_session_store_rehydrates_through_the_writer(kind, path):
+    writer = open_persistence(kind, path)
+    store = SessionStore(loader=writer.load_session, max_history=4)
+    session = store.get_or_create("s1")
+    for text in ["Hello", "Tell me about Korlaparti", "What is the price?", "I'm Asha", "Call 9845012345", "Thanks"]:
+        writer.record_message("s1", session.append("user", text))
+    writer.flush()
+    writer.close()
+
+    writer = open_persistence(kind, path)
+    restored = SessionStore(loader=writer.load_session, max_history=4).get_or_create("s1")
+    assert [msg.content for msg in restored.messages] == ["What is the price?", "I'm Asha", "Call 9845012345", "Thanks"]
+    # Lead details are extracted again from the restored messages
+    assert (restored.lead.name, restored.lead.phone) == ("Asha", "9845012345")
+    writer.close()
+
+
+def test_sqlite_syncs_every_commit(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "store.db"))
+    # 2 is FULL: one fsync per batch commit
+    assert backend._connect().execute("PRAGMA synchronous").fetchone()[0] == 2
+    backend.close()
+
+
+def test_torn_last_jsonl_line_is_cut_off(tmp_path, capsys):
+    path = str(tmp_path / "store.jsonl")
+    backend = JSONLBackend(path)
+    backend.write_batch([message("s1", 0), message("s1", 1)], [LEAD])
+    backend.close()
+    good_size = os.path.getsize(path)
+    with open(path, "ab") as log:
+        log.write(b'{"type": "message", "session_id": "s1", "ro')
+
+    backend = JSONLBackend(path)
+    assert "Persistence Error" in capsys.readouterr().out
+    assert os.path.getsize(path) == good_size
+    assert [msg.content for msg in backend.load_session("s1")] == ["turn 0", "turn 1"]
+
+    # New records start on a line of their own and read back after a restart
+    backend.write_batch([message("s1", 2)], [])
+    backend.close()
+    backend = JSONLBackend(path)
+    assert [msg.content for msg in backend.load_session("s1")] == ["turn 0", "turn 1", "turn 2"]
+    assert backend.load_leads() == [LEAD]
+    backend.close()
+
+
+def test_unreadable_jsonl_line_in_the_middle_is_skipped(tmp_path):
+    path = str(tmp_path / "store.jsonl")
+    backend = JSONLBackend(path)
+    backend.write_batch([message("s1", 0)], [])
+    backend.close()
+    with open(path, "rb") as log:
+        first = log.read()
+    with open(path, "ab") as log:
+        log.write(b"not json\n" + first.replace(b"turn 0", b"turn 1"))
+
+    size = os.path.getsize(path)
+    backend = JSONLBackend(path)
+    assert os.path.getsize(path) == size
+    assert [msg.content for msg in backend.load_session("s1")] == ["turn 0", "turn 1"]
+    assert backend.load_leads() == []
+    backend.close()
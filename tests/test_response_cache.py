@@ -0,0 +1,53 @@
+"""
+Tests for the LLM response cache's similarity tier, weighted by the
+corpus advanced_chatbot seeds it with
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("KNOWLEDGE_RELOAD_SECONDS", "0")
+
+from advanced_chatbot import KNOWLEDGE, cache_corpus  # noqa: E402
+from response_cache import ResponseCache, is_negated  # noqa: E402
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(cache_corpus(KNOWLEDGE.current))
+
+
+def test_rephrased_question_reuses_the_answer(cache):
+    cache.put("Is the yield shared with owners?", [], "Yes")
+    assert cache.get("Is the yield shared with the owners", []) == "Yes"
+    assert cache.stats["similar_hits"] == 1
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Is the yield shared with owners?", "Is the yield not shared with owners?"),
+    ("Is the yield shared with owners?", "Isn't the yield shared with owners?"),
+    ("Is the yield not shared with owners?", "Is the yield shared with owners?"),
+    ("Can I sell my plot within 5 years?", "Can I not sell my plot within 5 years?"),
+])
+def test_negated_question_never_gets_the_opposite_answer(cache, cached, asked):
+    # By their words alone these pairs score near or above the 0.85 threshold
+    assert float(cache._vector(cached) @ cache._vector(asked)) > 0.8
+    cache.put(cached, [], "Yes")
+    assert cache.get(asked, []) is None
+
+
+def test_negated_questions_match_each_other(cache):
+    cache.put("Is the yield not shared with owners?", [], "It is shared")
+    assert cache.get("Is yield not shared with the owners", []) == "It is shared"
+
+
+@pytest.mark.parametrize("question, negated", [
+    ("Is it not shared?", True), ("Can't I visit?", True), ("I don’t see prices", True),
+    ("No pets allowed?", True), ("Notice period for exit?", False), ("What is the price?", False),
+])
+def test_is_negated(question, negated):
+    assert is_negated(question) is negated
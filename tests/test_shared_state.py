@@ -0,0 +1,90 @@
+"""
+Tests for the shared SQLite session cache: every worker's copy of a
+conversation must end up holding every stored message, once, in order
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shared_state import SharedState  # noqa: E402
+
+TURNS = 300
+
+
+@pytest.fixture
+def states(tmp_path):
+    opened = []
+
+    def open_state(max_history=1000):
+        state = SharedState(str(tmp_path / "state.db"), max_history=max_history)
+        opened.append(state)
+        return state
+
+    yield open_state
+    for state in opened:
+        state.close()
+
+
+def chat(state, label, session_id="default", turns=TURNS):
+    for turn in range(turns):
+        session = state.sessions.get_or_create(session_id)
+        state.record_message(session_id, session.append("user", f"{label} {turn}"))
+
+
+def run_together(*targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def stored(state, session_id="default"):
+    return [message.content for message in state.load_session(session_id)]
+
+
+def cached(state, session_id="default"):
+    return [message.content for message in state.sessions.get_or_create(session_id).messages]
+
+
+def test_workers_writing_one_session_at_once_keep_complete_caches(states):
+    first, second = states(), states()
+    run_together(lambda: chat(first, "a"), lambda: chat(second, "b"))
+
+    assert len(stored(first)) == 2 * TURNS
+    for state in (first, second):
+        assert sorted(cached(state)) == sorted(stored(first))
+
+
+def test_threads_of_one_worker_do_not_duplicate_messages(states):
+    state, other = states(), states()
+    run_together(lambda: chat(state, "a"), lambda: chat(state, "b"), lambda: chat(other, "c"))
+
+    messages = cached(state)
+    assert len(messages) == len(set(messages)) == 3 * TURNS
+    assert sorted(messages) == sorted(stored(state))
+
+
+def test_cached_session_catches_up_and_keeps_its_summary(states):
+    first, second = states(max_history=4), states(max_history=4)
+    chat(first, "a", turns=3)
+    session = first.sessions.get_or_create("default")
+    session.summary = "summary"
+
+    chat(second, "b", turns=2)
+    session = first.sessions.get_or_create("default")
+    assert [message.content for message in session.messages] == ["a 1", "a 2", "b 0", "b 1"]
+    assert session.summary == "summary"
+
+
+def test_new_cache_entry_loads_only_the_latest_messages(states):
+    first = states(max_history=1000)
+    chat(first, "a", turns=20)
+    late = states(max_history=5)
+    assert cached(late) == [f"a {turn}" for turn in range(15, 20)]
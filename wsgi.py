@@ -0,0 +1,20 @@
+"""
+Neralu Farms AI Chatbot - Production Entry Point
+WSGI application for gunicorn, with the debugger and reloader off
+
+Run:
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+CHATBOT_APP=advanced serves advanced_chatbot.py instead of app.py. With more
+than one worker, sessions and leads are shared through SHARED_STATE_PATH
+(gunicorn.conf.py sets a default).
+"""
+
+import os
+
+if os.getenv('CHATBOT_APP', 'app') == 'advanced':
+    from advanced_chatbot import app as application
+else:
+    from app import app as application
+
+application.debug = False